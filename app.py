@@ -1,11 +1,11 @@
 import streamlit as st
 from interfaz.sidebar import construir_sidebar
 from interfaz.visualizaciones import (
-    mostrar_metricas, mostrar_evolucion, mostrar_clustering,
+    mostrar_metricas, mostrar_evolucion, mostrar_clustering, mostrar_barrido_k,
     mostrar_anomalias, mostrar_grafo
 )
 from servicios.procesa_partidos import cargar_partido, calcular_metricas
-from servicios.estudiar_evolucion import metricas_evolucion
+from servicios.estudiar_evolucion import iterar_evolucion
 from interfaz.paginas import mostrar_portada, mostrar_explicacion
 from servicios.visualizar_partidos import hay_datos_suficientes  # Importación añadida
 
@@ -33,8 +33,12 @@ if not st.session_state.inicio:
     seleccion_jugador_grafo,
     N_jugadores_cercanos,
     metricas_grafo,
+    pesos_grafo,
+    distancia_grafo,
     pulsa_generar_grafo,
+    k_clustering,
     pulsa_clustering,
+    pulsa_barrido_k,
     pulsa_anomalias,
     id_jugador_anomalia,
 ) = construir_sidebar()
@@ -69,13 +73,14 @@ if pulsa_evolucion:
     else:
         info = st.empty()
         info.info("Estudiando evolución del jugador...")
-        resultados_evol = metricas_evolucion(
+        resultados_evol = iterar_evolucion(
             id_jugador_seleccionado,
             metrica_jugador_seleccionada,
             grupo_metrica_jugador_seleccionado
         )
-        info.empty()
+        # El cálculo se hace mientras se dibuja el gráfico, partido a partido
         mostrar_evolucion(resultados_evol, metrica_jugador_seleccionada)
+        info.empty()
         st.success("Estudio finalizado con éxito")
 
 # ------------------- GRAFO -------------------
@@ -84,15 +89,25 @@ if pulsa_generar_grafo:
     if not metricas_grafo:
         st.warning("¡Seleccione una o varias métricas!")
     else:
-        mostrar_grafo(seleccion_jugador_grafo, metricas_grafo, N_jugadores_cercanos)
+        mostrar_grafo(
+            seleccion_jugador_grafo, metricas_grafo, N_jugadores_cercanos, pesos_grafo, distancia_grafo
+        )
         st.success("Grafo generado con éxito")
 
 # ------------------- CLUSTERING -------------------
 if pulsa_clustering:
     st.subheader("🔍 Clustering de jugadores")
-    mostrar_clustering()
+    mostrar_clustering(k_clustering)
     st.success("Clustering ejecutado con éxito")
 
+if pulsa_barrido_k:
+    st.subheader("📊 Comparación del número de perfiles")
+    info = st.empty()
+    info.info("Evaluando K-Means para k = 2...12...")
+    mostrar_barrido_k()
+    info.empty()
+    st.success("Comparación finalizada con éxito")
+
 # ------------------- ANOMALÍAS -------------------
 if pulsa_anomalias:
     st.subheader("🚨 Detección de anomalías")
@@ -0,0 +1,20 @@
+from servicios.comunidades_similitud import red_similitud, analizar_red, guardar_comunidades, RUTA_COMUNIDADES
+
+# CONFIGURACION
+METRICAS = None         # None = todas las columnas de config/metricas_con_nombres.csv
+VECINOS = 10            # vecinos más cercanos de cada jugador en la red
+DISTANCIA = 'euclidea'  # 'euclidea', 'coseno', 'mahalanobis' o 'rangos'
+RESOLUCION = 1.0        # resolución de Louvain (> 1 da familias más pequeñas)
+
+if __name__ == '__main__':
+    # Red kNN de toda la temporada
+    G = red_similitud(METRICAS, VECINOS, distancia=DISTANCIA)
+    print(f"Red de similitud: {G.number_of_nodes()} jugadores, {G.number_of_edges()} aristas")
+
+    # Familias físicas y centralidades
+    df_comunidades = analizar_red(G, RESOLUCION)
+    print(df_comunidades.groupby("comunidad").size().rename("jugadores"))
+    print(df_comunidades[df_comunidades["representativo"]][["comunidad", "Jugador"]].to_string(index=False))
+
+    guardar_comunidades(G, df_comunidades)
+    print(f"Comunidades guardadas en {RUTA_COMUNIDADES}")
@@ -0,0 +1,27 @@
+from servicios.cubo_temporada import actualizar_cubo, consultar_cubo
+
+# CONFIGURACION
+DATOS_PATH = 'datos'
+PROCESOS = None         # None = todos los núcleos
+DESDE, HASTA = 75, 90   # minutos de partido a comparar (p.ej. el último cuarto de hora)
+
+
+def mostrar_progreso(terminados, total, carpeta):
+    print(f"Añadido al cubo ({terminados}/{total}): {carpeta}")
+
+
+if __name__ == '__main__':
+    # Solo se calculan los partidos nuevos o modificados desde la última ejecución
+    cubo = actualizar_cubo(DATOS_PATH, procesos=PROCESOS, progreso=mostrar_progreso)
+    print(f"Cubo: {len(cubo['meta']['partidos'])} partidos, {len(cubo['partido'])} filas")
+
+    # Totales de la temporada por jugador y en el tramo final de los partidos
+    df_total = consultar_cubo(cubo, agrupar='jugador')
+    df_tramo = consultar_cubo(cubo, desde=DESDE, hasta=HASTA, agrupar='jugador')
+    df_total.to_csv('cubo_totales_jugador.csv', index=False)
+    df_tramo.to_csv(f'cubo_jugador_{DESDE}_{HASTA}.csv', index=False)
+
+    # Distancia por minuto de partido de cada equipo
+    df_equipos = consultar_cubo(cubo, agrupar=['equipo', 'minuto'])
+    df_equipos.to_csv('cubo_equipo_minuto.csv', index=False)
+    print(df_equipos.groupby('equipo')['totalDistance'].sum())
@@ -118,6 +118,28 @@ def construir_sidebar():
         inv_map.get(etiqueta, etiqueta) for etiqueta in seleccion_metricas_csv
     ]
 
+    distancias_grafo = {
+        "Euclídea": "euclidea",
+        "Coseno": "coseno",
+        "Mahalanobis": "mahalanobis",
+        "Percentiles": "rangos"
+    }
+    seleccion_distancia = st.sidebar.selectbox(
+        "Distancia entre jugadores:",
+        list(distancias_grafo.keys()),
+        key="distancia_grafo"
+    )
+    distancia_grafo = distancias_grafo[seleccion_distancia]
+
+    # Peso de cada métrica seleccionada en la distancia (1 = todas iguales)
+    pesos_metricas = {}
+    if claves_metricas_csv:
+        with st.sidebar.expander("Pesos de las métricas"):
+            for clave, etiqueta in zip(claves_metricas_csv, seleccion_metricas_csv):
+                pesos_metricas[clave] = st.slider(
+                    etiqueta, min_value=0.0, max_value=5.0, value=1.0, step=0.1, key=f"peso_{clave}"
+                )
+
     generar_grafo = st.sidebar.button("Generar grafo", key="btn_grafo")
 
     st.sidebar.write("")  # Espacio
@@ -127,7 +149,11 @@ def construir_sidebar():
     # -- 4. Clustering de perfiles físicos --
     
     st.sidebar.subheader("4. Clustering de perfiles físicos")
+    k_clustering = st.sidebar.slider(
+        "Número de perfiles (k):", min_value=2, max_value=12, value=3, step=1, key="k_clustering"
+    )
     ejecutar_clustering = st.sidebar.button("Ejecutar clustering", key="btn_clustering")
+    ejecutar_barrido = st.sidebar.button("Comparar valores de k", key="btn_barrido_k")
 
 
 
@@ -161,8 +187,12 @@ def construir_sidebar():
         seleccion_jugador_csv,
         N,
         claves_metricas_csv,
+        pesos_metricas,
+        distancia_grafo,
         generar_grafo,
+        k_clustering,
         ejecutar_clustering,
+        ejecutar_barrido,
         visualizar_anomalia,
         jugador_seleccionado_anomalia
     )
\ No newline at end of file
@@ -1,6 +1,5 @@
 import streamlit as st
 import pandas as pd
-import networkx as nx
 import altair as alt
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -12,8 +11,9 @@ from interfaz.visualizaciones_metricas import (
     mostrar_aceleraciones, mostrar_umbral_est, mostrar_umbral_rel
 )
 from utils.agrupacion_metricas import GRUPOS_METRICAS
-from servicios.clustering import clustering_perfiles
-from servicios.grafo_similitud import generar_grafo
+from servicios.clustering import clustering_perfiles, barrido_k
+from servicios.grafo_similitud import generar_grafo, disposicion_grafo
+from servicios.comunidades_similitud import cargar_comunidades, comunidad_jugador
 
 
 def mostrar_metricas(resultados):
@@ -40,19 +40,12 @@ def _obtener_label_legible(internal_key):
     return internal_key
 
 
-def mostrar_evolucion(resultados, metrica_label_legible):
-    if not resultados:
-        st.warning("No hay datos para mostrar evolución.")
-        return
-
-    if isinstance(metrica_label_legible, list) and len(metrica_label_legible) > 0:
-        metrica_label_legible = metrica_label_legible[0]
-
-    nombre_legible = _obtener_label_legible(metrica_label_legible)
+def _grafico_evolucion(resultados, nombre_legible):
     df = pd.DataFrame(resultados).rename(columns={"valor": nombre_legible})
 
-    chart = alt.Chart(df).mark_line(point=True).encode(
-        x=alt.X('match:N', title='Partido'),
+    # sort=None respeta el orden de los partidos (por fecha) en lugar del alfabético
+    return alt.Chart(df).mark_line(point=True).encode(
+        x=alt.X('match:N', title='Partido', sort=None),
         y=alt.Y(f'{nombre_legible}:Q', title=nombre_legible),
         tooltip=['match', nombre_legible]
     ).properties(
@@ -60,8 +53,38 @@ def mostrar_evolucion(resultados, metrica_label_legible):
         height=400
     )
 
+
+def mostrar_evolucion(resultados, metrica_label_legible):
+    """
+    Dibuja la evolución de la métrica. `resultados` puede ser la lista final de
+    {"match", "valor"} o el iterador de progreso de iterar_evolucion, en cuyo caso el
+    gráfico se va redibujando a medida que terminan los partidos.
+    """
+    if isinstance(metrica_label_legible, list) and len(metrica_label_legible) > 0:
+        metrica_label_legible = metrica_label_legible[0]
+
+    nombre_legible = _obtener_label_legible(metrica_label_legible)
+
+    if resultados is None or isinstance(resultados, list):
+        progreso = [(1, 1, resultados or [])]
+        barra = None
+    else:
+        progreso = resultados
+        barra = st.progress(0.0, text="Procesando partidos...")
+
     st.subheader(f"Evolución de {nombre_legible} a lo largo de los encuentros")
-    st.altair_chart(chart, use_container_width=True)
+    grafico = st.empty()
+    parciales = []
+    for terminados, total, parciales in progreso:
+        if barra is not None:
+            barra.progress(terminados / total, text=f"Partidos procesados: {terminados}/{total}")
+        if parciales:
+            grafico.altair_chart(_grafico_evolucion(parciales, nombre_legible), use_container_width=True)
+
+    if barra is not None:
+        barra.empty()
+    if not parciales:
+        st.warning("No hay datos para mostrar evolución.")
 
 
 def _mostrar_figura_en_streamlit(fig, ancho_px):
@@ -72,10 +95,10 @@ def _mostrar_figura_en_streamlit(fig, ancho_px):
     plt.close(fig)
 
 
-def mostrar_clustering():
+def mostrar_clustering(k=3):
     st.header("Clasificación automática de perfiles físicos (K-Means)")
 
-    df_cluster, resumen = clustering_perfiles()
+    df_cluster, resumen = clustering_perfiles(k)
 
     st.subheader("Visualización 2D de perfiles")
     fig, ax = plt.subplots(figsize=(6, 4))
@@ -86,38 +109,85 @@ def mostrar_clustering():
     st.subheader("Métricas medias por perfil")
     st.dataframe(resumen.style.format(precision=2), use_container_width=True)
 
-def mostrar_grafo(jugador_base, metricas_grafo, N):
-    df_vecinos = generar_grafo(jugador_base, metricas_grafo, N)
 
-    G = nx.Graph()
-    G.add_node(jugador_base)
-    for _, row in df_vecinos.iterrows():
-        jugador_similar = row["Jugador"]
-        G.add_node(jugador_similar)
-        G.add_edge(jugador_base, jugador_similar)
-
-    fig, ax = plt.subplots(figsize=(6, 4))
-    pos = nx.spring_layout(G, seed=42)
-    nx.draw(
-        G,
-        pos,
-        ax=ax,
-        with_labels=True,
-        node_color="skyblue",
-        edge_color="gray",
-        font_size=7
+def mostrar_barrido_k():
+    # Los ajustes ya guardados para esta versión del CSV no se repiten
+    df = barrido_k()
+    medidas = {
+        "inercia": "Inercia (menor es mejor)",
+        "silueta": "Silueta (mayor es mejor)",
+        "davies_bouldin": "Davies-Bouldin (menor es mejor)"
+    }
+    graficos = [
+        alt.Chart(df).mark_line(point=True).encode(
+            x=alt.X("k:O", title="k"),
+            y=alt.Y(f"{medida}:Q", title=titulo, scale=alt.Scale(zero=False)),
+            tooltip=["k", alt.Tooltip(f"{medida}:Q", format=".3f")]
+        ).properties(width=300, height=250)
+        for medida, titulo in medidas.items()
+    ]
+    st.altair_chart(alt.hconcat(*graficos), use_container_width=True)
+    st.dataframe(df.set_index("k").style.format(precision=3), use_container_width=True)
+
+def _grafico_grafo(disposicion, titulo):
+    base = disposicion.iloc[0]
+    aristas = disposicion.iloc[1:].assign(x0=base["x"], y0=base["y"])
+    # Misma escala en los dos ejes para que la longitud de las aristas sea la distancia
+    limite = max(disposicion["distancia"].max(), 1e-9) * 1.15
+    escala = alt.Scale(domain=[-limite, limite])
+    x = alt.X("x:Q", scale=escala, axis=None)
+    y = alt.Y("y:Q", scale=escala, axis=None)
+
+    lineas = alt.Chart(aristas).mark_rule(color="gray", opacity=0.5).encode(
+        x=x, y=y, x2="x0:Q", y2="y0:Q"
     )
-    ax.set_title(
-        f"{N} jugadores más similares a {jugador_base}\n"
-        f"según las métricas seleccionadas",
-        pad=10
+    if "comunidad" in disposicion.columns:
+        # Color por familia física; la del jugador base resaltada
+        color = alt.Color("comunidad:N", title="Familia física")
+        opacidad = alt.condition(alt.datum.misma_familia, alt.value(1.0), alt.value(0.35))
+        tooltip = ["Jugador", alt.Tooltip("distancia:Q", format=".3f"), "comunidad:N"]
+    else:
+        color = alt.Color("distancia:Q", scale=alt.Scale(scheme="blues", reverse=True), title="Distancia")
+        opacidad = alt.value(1.0)
+        tooltip = ["Jugador", alt.Tooltip("distancia:Q", format=".3f")]
+    nodos = alt.Chart(disposicion).mark_circle(size=120).encode(
+        x=x, y=y, color=color, opacity=opacidad, tooltip=tooltip
     )
-    ax.axis("off")
-    plt.tight_layout()
-    _mostrar_figura_en_streamlit(fig, ancho_px=1800)
+    etiquetas = alt.Chart(disposicion).mark_text(fontSize=9, dy=-10).encode(
+        x=x, y=y, text="Jugador"
+    )
+    return (lineas + nodos + etiquetas).properties(width=700, height=700, title=titulo)
 
 
+def mostrar_grafo(jugador_base, metricas_grafo, N, pesos=None, distancia="euclidea"):
+    df_vecinos = generar_grafo(jugador_base, metricas_grafo, N, pesos, distancia)
+    if df_vecinos is None:
+        return
 
+    # Disposición guardada por jugador, métricas y N: las vistas repetidas no la recalculan
+    disposicion = disposicion_grafo(jugador_base, df_vecinos, metricas_grafo, pesos, distancia)
+    titulo = [
+        f"{N} jugadores más similares a {jugador_base}",
+        "según las métricas seleccionadas (longitud de arista = distancia)"
+    ]
+
+    # Familias físicas precalculadas (estudios/comunidades_similitud.py), si existen
+    comunidades = cargar_comunidades()
+    familia = comunidad_jugador(comunidades, jugador_base) if comunidades is not None else None
+    if familia is not None:
+        comunidad = comunidades["jugadores"].set_index("Jugador")["comunidad"]
+        disposicion["comunidad"] = disposicion["Jugador"].map(comunidad).fillna(-1).astype(int)
+        disposicion["misma_familia"] = disposicion["comunidad"] == familia["comunidad"].iloc[0]
+
+    st.altair_chart(_grafico_grafo(disposicion, titulo), use_container_width=True)
+
+    if familia is not None:
+        st.subheader(f"Familia física de {jugador_base} ({len(familia)} jugadores)")
+        st.dataframe(
+            familia[["Jugador", "grado", "pagerank", "intermediacion", "cercania", "representativo"]]
+            .style.format(precision=3),
+            use_container_width=True
+        )
 
 
 def mostrar_anomalias(nombre_jugador):
@@ -0,0 +1,298 @@
+import numpy as np
+from scipy.signal import savgol_filter
+
+from servicios.almacen_tracking import como_columnar
+from servicios.jugadores import codificar_jugadores
+
+# Umbrales de velocidad (km/h) de las zonas estándar:
+# < 7 caminar, 7-15 trote, 15-20 carrera baja, 20-25 carrera alta, 25-30 sprint, > 30 muy alta
+UMBRALES_VELOCIDAD_KMH = (7, 15, 20, 25, 30)
+
+# Filtro Savitzky-Golay aplicado a posiciones y velocidades por jugador
+VENTANA_SAVGOL = 3
+ORDEN_SAVGOL = 1
+
+
+def es_cinematica(data):
+    return isinstance(data, dict) and data.get('tipo') == 'cinematica'
+
+
+def construir_cinematica(data):
+    """
+    Etapa cinemática compartida por todas las métricas colectivas.
+
+    Convierte el partido (lista de frames o partido columnar) en matrices frames x jugadores
+    de posición y velocidad una única vez. Las muestras por jugador y los suavizados que
+    necesita cada familia de métricas se calculan bajo demanda y se reutilizan.
+
+    Args:
+        data: Lista de frames, partido columnar o una cinemática ya construida.
+
+    Returns:
+        Diccionario con 'jugadores', 'codigos' (P,: código int32 de cada jugador, ver
+        servicios/jugadores.py), 'periodo', 'frame_idx' y 'game_clock' (F,), 'x', 'y', 'speed' y
+        'presente' (F x P).
+    """
+    if es_cinematica(data):
+        return data
+
+    partido = como_columnar(data)
+    x = np.array(partido['x'], dtype=np.float64)
+    codigos = partido.get('codigos')
+    return {
+        'tipo': 'cinematica',
+        'jugadores': list(partido['jugadores']),
+        'codigos': codificar_jugadores(partido['jugadores']) if codigos is None else np.asarray(codigos),
+        'periodo': np.array(partido['periodo']),
+        'frame_idx': np.array(partido['frame_idx']),
+        'game_clock': np.array(partido['game_clock'], dtype=np.float64),
+        'x': x,
+        'y': np.array(partido['y'], dtype=np.float64),
+        'speed': np.array(partido['speed'], dtype=np.float64),
+        'presente': ~np.isnan(x),
+        'cache': {},
+    }
+
+
+def frames_mismo_periodo(periodo, envolvente=True):
+    """
+    Máscara de los frames que se procesan: aquellos cuyo periodo coincide con el del frame anterior.
+
+    Con envolvente=True el primer frame se compara con el último, igual que hacía
+    data[frame_index - 1] en los bucles por frames; si no, el primer frame se descarta siempre.
+    """
+    validos = periodo == np.roll(periodo, 1)
+    if not envolvente and len(validos):
+        validos[0] = False
+    return validos
+
+
+def crear_muestras(codigo, frame, x, y, speed):
+    """
+    Agrupa las muestras de varios jugadores en arrays planos ordenados por jugador y frame.
+    'inicio' marca la primera muestra de cada jugador.
+    """
+    inicio = np.ones(len(codigo), dtype=bool)
+    inicio[1:] = codigo[1:] != codigo[:-1]
+    return {'codigo': codigo, 'frame': frame, 'x': x, 'y': y, 'speed': speed, 'inicio': inicio}
+
+
+def seleccionar_muestras(muestras, seleccion):
+    """
+    Subconjunto de muestras (máscara booleana), recalculando los inicios de cada jugador.
+    """
+    return crear_muestras(
+        muestras['codigo'][seleccion], muestras['frame'][seleccion],
+        muestras['x'][seleccion], muestras['y'][seleccion], muestras['speed'][seleccion]
+    )
+
+
+def muestras_jugadores(cinematica, frames=None):
+    """
+    Muestras de todos los jugadores presentes en los frames indicados (máscara sobre frames;
+    None = todos), ordenadas por jugador y frame.
+    """
+    valido = cinematica['presente']
+    if frames is not None:
+        valido = valido & frames[:, None]
+    codigo, frame = np.nonzero(valido.T)
+    return crear_muestras(
+        codigo, frame,
+        cinematica['x'][frame, codigo], cinematica['y'][frame, codigo], cinematica['speed'][frame, codigo]
+    )
+
+
+def muestras_validas(cinematica, envolvente=True):
+    """
+    Muestras de los frames sin cambio de periodo (ver frames_mismo_periodo), cacheadas
+    en la cinemática para que todas las familias de métricas las compartan.
+    """
+    clave = ('muestras', envolvente)
+    if clave not in cinematica['cache']:
+        frames = frames_mismo_periodo(cinematica['periodo'], envolvente)
+        cinematica['cache'][clave] = muestras_jugadores(cinematica, frames)
+    return cinematica['cache'][clave]
+
+
+def muestras_suavizadas(cinematica, envolvente=True):
+    """
+    Posiciones y velocidades suavizadas con Savitzky-Golay (ventana 3, orden 1) sobre las
+    muestras válidas de cada jugador. Cacheadas en la cinemática.
+    """
+    clave = ('suavizadas', envolvente)
+    if clave not in cinematica['cache']:
+        muestras = muestras_validas(cinematica, envolvente)
+        suavizadas = dict(muestras)
+        for campo in ('x', 'y', 'speed'):
+            suavizadas[campo] = suavizar(muestras[campo], muestras['inicio'], VENTANA_SAVGOL, ORDEN_SAVGOL)
+        cinematica['cache'][clave] = suavizadas
+    return cinematica['cache'][clave]
+
+
+def suavizar(valores, inicio, ventana, orden, modo='interp'):
+    """
+    Aplica savgol_filter por separado a la serie de cada jugador (solo si tiene al menos
+    `ventana` muestras, como en el cálculo original).
+    """
+    resultado = np.array(valores, dtype=np.float64)
+    limites = np.append(np.flatnonzero(inicio), len(valores))
+    for a, b in zip(limites[:-1], limites[1:]):
+        if b - a >= ventana:
+            resultado[a:b] = savgol_filter(resultado[a:b], ventana, orden, mode=modo)
+    return resultado
+
+
+def anterior(valores, inicio, relleno=0.0):
+    """
+    Valor de la muestra anterior del mismo jugador (`relleno` en la primera muestra).
+    """
+    previos = np.roll(valores, 1)
+    previos[inicio] = relleno
+    return previos
+
+
+def distancias(x, y, inicio):
+    """
+    Distancia euclídea entre cada muestra y la anterior del mismo jugador (0 en la primera).
+    """
+    dist = np.hypot(np.diff(x, prepend=x[:1]), np.diff(y, prepend=y[:1]))
+    dist[inicio] = 0.0
+    return dist
+
+
+def zona_velocidad(velocidad_kmh):
+    """
+    Índice de zona estándar de velocidad (0 caminar ... 5 velocidad muy alta).
+    Caminar es < 7 km/h; el resto de zonas incluyen su límite superior.
+    """
+    zona = np.digitize(velocidad_kmh, UMBRALES_VELOCIDAD_KMH[1:], right=True) + 1
+    zona[velocidad_kmh < UMBRALES_VELOCIDAD_KMH[0]] = 0
+    return zona
+
+
+def sumar_por_jugador(valores, codigo, n_jugadores):
+    return np.bincount(codigo, weights=valores, minlength=n_jugadores)
+
+
+def contar_por_jugador(mascara, codigo, n_jugadores):
+    return np.bincount(codigo[mascara], minlength=n_jugadores)
+
+
+def maximo_por_jugador(valores, muestras, n_jugadores, inicial=0.0):
+    """
+    Máximo de `valores` por jugador, partiendo de `inicial` (como los acumuladores originales).
+    """
+    resultado = np.full(n_jugadores, inicial, dtype=np.float64)
+    inicios = np.flatnonzero(muestras['inicio'])
+    if len(inicios):
+        maximos = np.maximum.reduceat(valores, inicios)
+        codigos = muestras['codigo'][inicios]
+        resultado[codigos] = np.maximum(resultado[codigos], maximos)
+    return resultado
+
+
+def detectar_esfuerzos(entrada, inicio, salida=None, duracion_minima=1):
+    """
+    Detector de esfuerzos compartido por todas las métricas de esfuerzos, aplicado a las
+    series de todos los jugadores a la vez con operaciones sobre arrays.
+
+    Un esfuerzo empieza cuando se cumple `entrada` sin estar ya en esfuerzo y dura hasta la
+    muestra anterior a la que cumple `salida` (o hasta el final de la serie del jugador).
+    Con condiciones de entrada y salida distintas se obtiene histéresis (ver esfuerzos_umbral).
+    El estado se reinicia en la primera muestra de cada jugador.
+
+    Args:
+        entrada: Máscara booleana, o serie por bandas (entero, -1 = fuera de banda), de las
+                 muestras que inician o mantienen un esfuerzo.
+        inicio: Máscara de la primera muestra de cada jugador.
+        salida: Máscara de las muestras que terminan el esfuerzo (por defecto, las que no
+                cumplen `entrada`).
+        duracion_minima: Muestras mínimas para que un esfuerzo cuente.
+
+    Returns:
+        Diccionario con 'activo' (máscara de muestras en esfuerzo), 'comienzo' (máscara de
+        la primera muestra de cada esfuerzo), 'inicios' y 'fines' (índices; el fin es
+        exclusivo), 'duraciones' (en muestras) y, con una serie por bandas, 'banda' (banda
+        en la que empieza cada esfuerzo).
+    """
+    entrada = np.asarray(entrada)
+    bandas = entrada if entrada.dtype.kind in 'iu' else None
+    if bandas is not None:
+        entrada = bandas >= 0
+    salida = ~entrada if salida is None else np.asarray(salida, dtype=bool)
+
+    posicion = np.arange(len(entrada))
+    evento = np.where(entrada, 1, np.where(salida, 0, -1))
+    ultimo = np.maximum.accumulate(np.where((evento >= 0) | inicio, posicion, 0))
+    activo = evento[ultimo] == 1
+
+    previo = np.roll(activo, 1)
+    previo[inicio] = False
+    comienzo = activo & ~previo
+    # Un esfuerzo acaba antes de la primera muestra inactiva o del cambio de jugador
+    ultimo_de_serie = np.roll(inicio, -1)
+    if len(ultimo_de_serie):
+        ultimo_de_serie[-1] = True
+    final = activo & (~np.roll(activo, -1) | ultimo_de_serie)
+
+    inicios = np.flatnonzero(comienzo)
+    fines = np.flatnonzero(final) + 1
+    duraciones = fines - inicios
+
+    if duracion_minima > 1:
+        cortos = duraciones < duracion_minima
+        marcas = np.zeros(len(entrada) + 1, dtype=np.int64)
+        np.add.at(marcas, inicios[cortos], 1)
+        np.add.at(marcas, fines[cortos], -1)
+        activo = activo & (np.cumsum(marcas[:-1]) == 0)
+        comienzo = comienzo & activo
+        inicios, fines, duraciones = inicios[~cortos], fines[~cortos], duraciones[~cortos]
+
+    esfuerzos = {
+        'activo': activo,
+        'comienzo': comienzo,
+        'inicios': inicios,
+        'fines': fines,
+        'duraciones': duraciones,
+    }
+    if bandas is not None:
+        esfuerzos['banda'] = bandas[inicios]
+    return esfuerzos
+
+
+def esfuerzos_umbral(valores, umbral, inicio, histeresis=0.0, duracion_minima=1):
+    """
+    Esfuerzos por encima de un umbral: empiezan al alcanzar `umbral` y terminan al bajar de
+    `umbral - histeresis` (ver detectar_esfuerzos).
+    """
+    return detectar_esfuerzos(
+        valores >= umbral, inicio, salida=valores < umbral - histeresis, duracion_minima=duracion_minima
+    )
+
+
+def matriz_por_frame(valores, muestras, n_frames, n_jugadores):
+    """
+    Reparte valores por muestra en una matriz frames x jugadores (0 donde no hay muestra).
+    """
+    matriz = np.zeros((n_frames, n_jugadores))
+    matriz[muestras['frame'], muestras['codigo']] = valores
+    return matriz
+
+
+def sumas_acumuladas(matriz):
+    """
+    Sumas acumuladas por columna con una fila inicial de ceros: la suma de los frames
+    [a, b) es acumuladas[b] - acumuladas[a].
+    """
+    acumuladas = np.zeros((len(matriz) + 1,) + matriz.shape[1:])
+    np.cumsum(matriz, axis=0, out=acumuladas[1:])
+    return acumuladas
+
+
+def orden_jugadores(muestras):
+    """
+    Códigos de los jugadores con muestras, en orden de primera aparición.
+    """
+    inicios = np.flatnonzero(muestras['inicio'])
+    orden = np.argsort(muestras['frame'][inicios], kind='stable')
+    return muestras['codigo'][inicios][orden]
@@ -0,0 +1,90 @@
+import numpy as np
+
+from metricas.cinematica import (
+    construir_cinematica, muestras_validas, muestras_suavizadas, distancias, detectar_esfuerzos
+)
+from metricas.colectivas.potencia_metabolica import potencia_muestras
+from metricas.colectivas.distancia_aceleraciones import muestras_aceleracion, rango_aceleracion
+from metricas.colectivas.metricas_por_intervalo import minutos_partido
+
+TIPOS_ESFUERZO = ('sprint', 'aceleracion', 'carga_metabolica_alta')
+UMBRAL_SPRINT_KMH = 25     # como 'esfuerzos_sprint' de los umbrales relativos
+
+
+def _maximo_tramos(valores, inicios, fines):
+    """Máximo de `valores` en cada tramo [inicio, fin) (tramos no vacíos y sin solaparse)."""
+    if not len(inicios):
+        return np.zeros(0)
+    limites = np.ravel(np.column_stack([inicios, fines]))
+    extendidos = np.append(valores, 0.0)
+    return np.maximum.reduceat(extendidos, limites)[::2]
+
+
+def _eventos(tipo, muestras, esfuerzos, pico, distancia, cinematica, minutos, frame_duration):
+    """Tabla de eventos de un tipo a partir de los esfuerzos de detectar_esfuerzos."""
+    inicios, fines = esfuerzos['inicios'], esfuerzos['fines']
+    recorrida = np.concatenate([[0.0], np.cumsum(distancia)])
+    # Filas de la cinemática (submuestreada) en que empieza y acaba cada evento
+    fila_inicio = muestras['frame'][inicios]
+    fila_fin = muestras['frame'][fines - 1]
+    return {
+        'jugador': muestras['codigo'][inicios],
+        'tipo': np.full(len(inicios), TIPOS_ESFUERZO.index(tipo)),
+        'banda': esfuerzos.get('banda', np.full(len(inicios), -1)),
+        'periodo': cinematica['periodo'][fila_inicio],
+        'frame_inicio': cinematica['frame_idx'][fila_inicio],
+        'frame_fin': cinematica['frame_idx'][fila_fin],
+        'reloj_inicio': cinematica['game_clock'][fila_inicio],
+        'reloj_fin': cinematica['game_clock'][fila_fin],
+        'minuto': minutos[fila_inicio],
+        'duracion': esfuerzos['duraciones'] * frame_duration,
+        'pico': _maximo_tramos(pico, inicios, fines),
+        'distancia': recorrida[fines] - recorrida[inicios],
+    }
+
+
+def calcular_eventos(data, frame_duration):
+    """
+    Registro de esfuerzos del partido: un evento por sprint, esfuerzo de aceleración y
+    esfuerzo de carga metabólica alta, con las mismas muestras y umbrales que las métricas
+    que los cuentan (esfuerzos_sprint, num_efforts_* y HMLe).
+
+    Returns:
+        Diccionario de arrays alineados, un elemento por evento: 'jugador' (código de columna
+        del partido), 'tipo' (posición en TIPOS_ESFUERZO), 'banda' (rango de aceleración en
+        que empieza, -1 si no aplica), 'periodo', 'frame_inicio' y 'frame_fin' (frameIdx del
+        tracking, ambos incluidos), 'reloj_inicio' y 'reloj_fin' (reloj de juego en s),
+        'minuto' (minuto de partido en que empieza), 'duracion' (s), 'pico' (velocidad máxima en km/h,
+        aceleración máxima en m/s² o potencia máxima en W/kg) y 'distancia' (m).
+    """
+    cinematica = construir_cinematica(data)
+    minutos = minutos_partido(cinematica['periodo'], cinematica['game_clock'])
+    tablas = []
+
+    # Sprints: velocidad original y distancia sobre posiciones suavizadas
+    validas = muestras_validas(cinematica)
+    suavizadas = muestras_suavizadas(cinematica)
+    velocidad = validas['speed'] * 3.6
+    distancia = distancias(suavizadas['x'], suavizadas['y'], suavizadas['inicio'])
+    # La primera muestra de cada jugador no cuenta, como en los umbrales relativos
+    procesada = ~validas['inicio']
+    sprints = detectar_esfuerzos(
+        (velocidad >= UMBRAL_SPRINT_KMH) & procesada, validas['inicio'],
+        salida=(velocidad < UMBRAL_SPRINT_KMH) & procesada
+    )
+    tablas.append(_eventos('sprint', validas, sprints, velocidad, distancia, cinematica, minutos, frame_duration))
+
+    # Esfuerzos de aceleración por rangos
+    muestras, aceleracion = muestras_aceleracion(cinematica, frame_duration)
+    distancia = distancias(muestras['x'], muestras['y'], muestras['inicio'])
+    esfuerzos = detectar_esfuerzos(rango_aceleracion(aceleracion), muestras['inicio'])
+    tablas.append(_eventos('aceleracion', muestras, esfuerzos, aceleracion, distancia, cinematica, minutos,
+                           frame_duration))
+
+    # Carga metabólica alta
+    potencia, distancia, alta = potencia_muestras(validas, frame_duration)
+    esfuerzos = detectar_esfuerzos(alta, validas['inicio'])
+    tablas.append(_eventos('carga_metabolica_alta', validas, esfuerzos, potencia, distancia, cinematica,
+                           minutos, frame_duration))
+
+    return {campo: np.concatenate([tabla[campo] for tabla in tablas]) for campo in tablas[0]}
@@ -0,0 +1,200 @@
+import numpy as np
+import pandas as pd
+
+from metricas.cinematica import (
+    construir_cinematica, muestras_validas, muestras_suavizadas, distancias, zona_velocidad,
+    detectar_esfuerzos, sumas_acumuladas
+)
+from metricas.colectivas.potencia_metabolica import potencia_muestras
+from metricas.colectivas.distancia_aceleraciones import (
+    muestras_aceleracion, rango_aceleracion, RANGOS_ACELERACION, ACELERACION_MAXIMA
+)
+from metricas.colectivas.distancia_umbrales_estandar import ZONAS_DISTANCIA
+
+RESOLUCION_SEGUNDOS = 1     # resolución temporal de los acumulados (segundos de reloj de juego)
+INICIO_PERIODO_MIN = {1: 0, 2: 45, 3: 90, 4: 105}   # minuto de partido en que empieza cada periodo
+COLUMNAS_ENTERAS = (
+    ['HMLe'] + [f'num_efforts_{sufijo}' for _, _, sufijo in RANGOS_ACELERACION] + ['num_efforts_max_acc']
+)
+
+
+def minutos_partido(periodo, game_clock):
+    """
+    Minuto de partido de cada frame: minuto de inicio del periodo más el reloj de juego.
+    Si el reloj de un periodo ya es continuo (empieza en su minuto de inicio o después)
+    no se suma nada.
+    """
+    minutos = np.asarray(game_clock, dtype=np.float64) / 60
+    for p in np.unique(periodo):
+        en_periodo = periodo == p
+        inicio = INICIO_PERIODO_MIN.get(int(p), 0)
+        if minutos[en_periodo].min() < inicio:
+            minutos[en_periodo] += inicio
+    return minutos
+
+
+def _por_tramo(valores, muestras, tramo_frame, n_tramos, n_jugadores):
+    """Suma de `valores` por tramo de tiempo y jugador (matriz tramos x jugadores)."""
+    clave = tramo_frame[muestras['frame']] * n_jugadores + muestras['codigo']
+    return np.bincount(
+        clave, weights=np.broadcast_to(np.asarray(valores, dtype=np.float64), clave.shape),
+        minlength=n_tramos * n_jugadores
+    ).reshape(n_tramos, n_jugadores)
+
+
+def construir_acumulados(data, frame_duration, resolucion=RESOLUCION_SEGUNDOS):
+    """
+    Representación en sumas acumuladas de las métricas aditivas del partido: minutos jugados,
+    distancia total y por zona estándar de velocidad, HMLD, HMLe y suma de potencia metabólica
+    (la media es metabolicPowerSum / frames), distancias y esfuerzos por rango de aceleración.
+    Cada métrica se calcula sobre las mismas muestras que su familia, así que el partido
+    completo reproduce sus totales.
+
+    Los frames se agrupan en tramos de `resolucion` segundos de reloj dentro de cada periodo;
+    cualquier intervalo se obtiene después restando dos filas (ver consultar_valores).
+
+    Returns:
+        Diccionario con 'codigos' (P,), 'periodo' y 'minuto' (T,: minuto de partido en que
+        empieza cada tramo), 'columnas' (M) y 'sumas' ((T + 1) x P x M).
+    """
+    cinematica = construir_cinematica(data)
+    periodo = cinematica['periodo']
+    n_jugadores = len(cinematica['jugadores'])
+
+    # Tramos de tiempo: frames consecutivos del mismo periodo y segundo de reloj
+    reloj = np.floor(cinematica['game_clock'] / resolucion) * resolucion
+    cambio = np.ones(len(periodo), dtype=bool)
+    cambio[1:] = (periodo[1:] != periodo[:-1]) | (reloj[1:] != reloj[:-1])
+    tramo_frame = np.cumsum(cambio) - 1
+    n_tramos = int(tramo_frame[-1]) + 1 if len(tramo_frame) else 0
+    inicios = np.flatnonzero(cambio)
+
+    def por_tramo(valores, muestras):
+        return _por_tramo(valores, muestras, tramo_frame, n_tramos, n_jugadores)
+
+    series = {}
+
+    # Minutos jugados (como ritmo de juego)
+    ritmo = muestras_suavizadas(cinematica, envolvente=False)
+    series['playingTime'] = por_tramo(frame_duration / 60, ritmo)
+
+    # Distancias por umbral estándar
+    suavizadas = muestras_suavizadas(cinematica)
+    distancia = distancias(suavizadas['x'], suavizadas['y'], suavizadas['inicio'])
+    zona = zona_velocidad(suavizadas['speed'] * 3.6)
+    series['totalDistance'] = por_tramo(distancia, suavizadas)
+    for i, columna in enumerate(ZONAS_DISTANCIA):
+        series[columna] = por_tramo(np.where(zona == i, distancia, 0.0), suavizadas)
+
+    # Carga metabólica alta
+    validas = muestras_validas(cinematica)
+    potencia, distancia_potencia, alta = potencia_muestras(validas, frame_duration)
+    series['HMLD'] = por_tramo(np.where(alta, distancia_potencia, 0.0), validas)
+    series['HMLe'] = por_tramo(detectar_esfuerzos(alta, validas['inicio'])['comienzo'], validas)
+    series['metabolicPowerSum'] = por_tramo(potencia, validas)
+
+    # Distancias y esfuerzos por rango de aceleración
+    muestras, aceleracion = muestras_aceleracion(cinematica, frame_duration)
+    distancia_acc = distancias(muestras['x'], muestras['y'], muestras['inicio'])
+    rango = rango_aceleracion(aceleracion)
+    esfuerzos = detectar_esfuerzos(rango, muestras['inicio'])['comienzo']
+    for i, (_, _, sufijo) in enumerate(RANGOS_ACELERACION):
+        series[f'acc_dist_{sufijo}'] = por_tramo(np.where(rango == i, distancia_acc, 0.0), muestras)
+    for i, (_, _, sufijo) in enumerate(RANGOS_ACELERACION):
+        series[f'num_efforts_{sufijo}'] = por_tramo(esfuerzos & (rango == i), muestras)
+    series['num_efforts_max_acc'] = por_tramo(aceleracion > ACELERACION_MAXIMA, muestras)
+
+    return {
+        'tipo': 'acumulados',
+        'codigos': cinematica['codigos'],
+        'periodo': periodo[inicios],
+        'minuto': minutos_partido(periodo, reloj)[inicios],
+        'columnas': list(series),
+        'sumas': sumas_acumuladas(np.stack(list(series.values()), axis=-1)),
+    }
+
+
+def consultar_valores(acumulados, desde=None, hasta=None, periodo=None):
+    """
+    Métricas de todos los jugadores en los minutos de partido [desde, hasta), sin recalcular:
+    una búsqueda binaria y una resta por periodo.
+
+    Args:
+        acumulados: Resultado de construir_acumulados.
+        desde, hasta: Minutos de partido (None = sin límite).
+        periodo: Limita la consulta a un periodo (None = todos). Útil para separar el
+                 descuento de la primera parte de los primeros minutos de la segunda.
+
+    Returns:
+        Matriz P x M con las columnas de acumulados['columnas'].
+    """
+    sumas = acumulados['sumas']
+    total = np.zeros(sumas.shape[1:])
+    periodos = np.unique(acumulados['periodo']) if periodo is None else [periodo]
+    for p in periodos:
+        tramos = np.flatnonzero(acumulados['periodo'] == p)
+        if not len(tramos):
+            continue
+        a, b = tramos[0], tramos[-1] + 1
+        minutos = acumulados['minuto'][a:b]
+        inicio = a if desde is None else a + np.searchsorted(minutos, desde, side='left')
+        fin = b if hasta is None else a + np.searchsorted(minutos, hasta, side='left')
+        if fin > inicio:
+            total += sumas[fin] - sumas[inicio]
+    return total
+
+
+def _tabla(acumulados, valores):
+    """DataFrame con los jugadores que han jugado en el intervalo."""
+    columnas = acumulados['columnas']
+    jugados = valores[:, columnas.index('playingTime')] > 0
+    df = pd.DataFrame({'playerId': acumulados['codigos'][jugados]})
+    for k, columna in enumerate(columnas):
+        serie = valores[jugados, k]
+        df[columna] = np.rint(serie).astype(int) if columna in COLUMNAS_ENTERAS else serie.round(2)
+    return df
+
+
+def consultar_intervalo(acumulados, desde=None, hasta=None, periodo=None):
+    """
+    Igual que consultar_valores, como DataFrame con 'playerId' y una columna por métrica
+    (solo los jugadores que han jugado en el intervalo).
+    """
+    return _tabla(acumulados, consultar_valores(acumulados, desde, hasta, periodo))
+
+
+def metricas_por_partes(acumulados):
+    """Diccionario periodo -> DataFrame con las métricas de cada parte."""
+    return {
+        int(p): consultar_intervalo(acumulados, periodo=p)
+        for p in np.unique(acumulados['periodo'])
+    }
+
+
+def metricas_por_intervalo(acumulados, minutos=5):
+    """
+    Tabla de todo el partido en intervalos de `minutos` minutos dentro de cada periodo
+    (p.ej. 0-5, 5-10, ..., 45-50 de la segunda parte).
+
+    Returns:
+        DataFrame con 'periodo', 'desde', 'hasta', 'playerId' y una columna por métrica.
+    """
+    tablas = []
+    for p in np.unique(acumulados['periodo']):
+        tramos = np.flatnonzero(acumulados['periodo'] == p)
+        a = tramos[0]
+        minuto = acumulados['minuto'][tramos]
+        limites = np.arange(
+            np.floor(minuto[0] / minutos) * minutos, minuto[-1] + minutos, minutos
+        )
+        posiciones = a + np.searchsorted(minuto, limites, side='left')
+        intervalos = acumulados['sumas'][posiciones[1:]] - acumulados['sumas'][posiciones[:-1]]
+        for desde, hasta, valores in zip(limites[:-1], limites[1:], intervalos):
+            df = _tabla(acumulados, valores)
+            df.insert(0, 'hasta', hasta)
+            df.insert(0, 'desde', desde)
+            df.insert(0, 'periodo', int(p))
+            tablas.append(df)
+    if not tablas:
+        return pd.DataFrame(columns=['periodo', 'desde', 'hasta', 'playerId'] + acumulados['columnas'])
+    return pd.concat(tablas, ignore_index=True)
@@ -1,56 +1,78 @@
+from metricas.cinematica import construir_cinematica
 from .ritmo_de_juego import ritmo_juego
 from .distancia_aceleraciones import dist_aceleraciones
 from .distancia_umbrales_estandar import dist_umbrales_estandar
 from .distancia_umbrales_relativos import dist_umbrales_relativos
 
+# Columnas seleccionadas de cada familia, renombradas para evitar conflictos
+RENOMBRAR_RITMO = {
+    'walkingRhythm': 'walkingRhythm_ritmo',
+    'joggingRhythm': 'joggingRhythm_ritmo',
+    'lowSpeedRunningRhythm': 'lowSpeedRunningRhythm_ritmo',
+    'highSpeedRunningRhythm': 'highSpeedRunningRhythm_ritmo',
+    'sprintRhythm': 'sprintRhythm_ritmo',
+    'veryHighSpeedRhythm': 'veryHighSpeedRhythm_ritmo'
+}
+RENOMBRAR_ACELERACIONES = {
+    'acc_dist_3_4': 'acc_dist_3_4_aceleraciones',
+    'acc_dist_5_6': 'acc_dist_5_6_aceleraciones',
+    'max_acceleration': 'max_acceleration_aceleraciones',
+    'num_efforts_0_1': 'num_efforts_0_1_aceleraciones',
+    'num_efforts_1_2': 'num_efforts_1_2_aceleraciones',
+    'num_efforts_2_3': 'num_efforts_2_3_aceleraciones',
+    'num_efforts_3_4': 'num_efforts_3_4_aceleraciones',
+    'num_efforts_5_6': 'num_efforts_5_6_aceleraciones',
+    'num_efforts_max_acc': 'num_efforts_max_acc_aceleraciones'
+}
+RENOMBRAR_UMBRAL_EST = {
+    'walkingDistance': 'walkingDistance_umbral_est',
+    'joggingDistance': 'joggingDistance_umbral_est'
+}
+RENOMBRAR_UMBRAL_REL = {
+    'distance_above_95_percent': 'distance_above_95_percent_umbral_rel',
+    'maxSpeed': 'maxSpeed_umbral_rel',
+    'esfuerzos_above_95_percent': 'esfuerzos_above_95_percent_umbral_rel'
+}
+
+# Columnas de config/metricas_con_nombres.csv (además de 'Jugador')
+COLUMNAS_SELECCIONADAS = (
+    list(RENOMBRAR_RITMO.values()) + list(RENOMBRAR_ACELERACIONES.values())
+    + list(RENOMBRAR_UMBRAL_EST.values()) + list(RENOMBRAR_UMBRAL_REL.values())
+)
 
-def metricas_seleccionadas(data, frame_duration, min_minutes=70):
-    # Calcula métricas por jugador
-    df_ritmo = ritmo_juego(data, frame_duration)
-    df_acc = dist_aceleraciones(data, frame_duration)
-    df_umbral_est = dist_umbrales_estandar(data, frame_duration)
-    df_umbral_rel = dist_umbrales_relativos(data, frame_duration)
 
+def combinar_metricas_seleccionadas(df_ritmo, df_acc, df_umbral_est, df_umbral_rel, min_minutes=70,
+                                    incluir_minutos=False):
+    """
+    Une las tablas de ritmo, aceleraciones y umbrales en una fila por jugador con las
+    columnas renombradas, descartando a los jugadores con menos de `min_minutes` jugados.
+    Si `incluir_minutos` es True se conserva la columna 'playingTime'.
+    """
     # Filtra por tiempo mínimo jugado
     df_ritmo = df_ritmo[df_ritmo['playingTime'] >= min_minutes].copy()
-    df_ritmo.drop(columns=['playingTime'], inplace=True, errors='ignore')
+    if not incluir_minutos:
+        df_ritmo.drop(columns=['playingTime'], inplace=True, errors='ignore')
 
     # Renombra columnas para evitar conflictos
-    df_ritmo = df_ritmo.rename(columns={
-        'walkingRhythm': 'walkingRhythm_ritmo',
-        'joggingRhythm': 'joggingRhythm_ritmo',
-        'lowSpeedRunningRhythm': 'lowSpeedRunningRhythm_ritmo',
-        'highSpeedRunningRhythm': 'highSpeedRunningRhythm_ritmo',
-        'sprintRhythm': 'sprintRhythm_ritmo',
-        'veryHighSpeedRhythm': 'veryHighSpeedRhythm_ritmo'
-    })
-
-    df_acc = df_acc.rename(columns={
-        'acc_dist_3_4': 'acc_dist_3_4_aceleraciones',
-        'acc_dist_5_6': 'acc_dist_5_6_aceleraciones',
-        'max_acceleration': 'max_acceleration_aceleraciones',
-        'num_efforts_0_1': 'num_efforts_0_1_aceleraciones',
-        'num_efforts_1_2': 'num_efforts_1_2_aceleraciones',
-        'num_efforts_2_3': 'num_efforts_2_3_aceleraciones',
-        'num_efforts_3_4': 'num_efforts_3_4_aceleraciones',
-        'num_efforts_5_6': 'num_efforts_5_6_aceleraciones',
-        'num_efforts_max_acc': 'num_efforts_max_acc_aceleraciones'
-    })
-
-    df_umbral_est = df_umbral_est.rename(columns={
-        'walkingDistance': 'walkingDistance_umbral_est',
-        'joggingDistance': 'joggingDistance_umbral_est'
-    })
-
-    df_umbral_rel = df_umbral_rel.rename(columns={
-        'distance_above_95_percent': 'distance_above_95_percent_umbral_rel',
-        'maxSpeed': 'maxSpeed_umbral_rel',
-        'esfuerzos_above_95_percent': 'esfuerzos_above_95_percent_umbral_rel'
-    })
+    df_ritmo = df_ritmo.rename(columns=RENOMBRAR_RITMO)
+    df_acc = df_acc.rename(columns=RENOMBRAR_ACELERACIONES)
+    df_umbral_est = df_umbral_est.rename(columns=RENOMBRAR_UMBRAL_EST)
+    df_umbral_rel = df_umbral_rel.rename(columns=RENOMBRAR_UMBRAL_REL)
 
     # Combina métricas por playerId
     df = df_ritmo.merge(df_acc, on='playerId', how='inner')
     df = df.merge(df_umbral_est, on='playerId', how='inner')
     df = df.merge(df_umbral_rel, on='playerId', how='inner')
 
-    return df.reset_index(drop=True)
\ No newline at end of file
+    return df.reset_index(drop=True)
+
+
+def metricas_seleccionadas(data, frame_duration, min_minutes=70):
+    # Calcula métricas por jugador sobre una única etapa cinemática
+    cinematica = construir_cinematica(data)
+    df_ritmo = ritmo_juego(cinematica, frame_duration)
+    df_acc = dist_aceleraciones(cinematica, frame_duration)
+    df_umbral_est = dist_umbrales_estandar(cinematica, frame_duration)
+    df_umbral_rel = dist_umbrales_relativos(cinematica, frame_duration)
+
+    return combinar_metricas_seleccionadas(df_ritmo, df_acc, df_umbral_est, df_umbral_rel, min_minutes)
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+from metricas.cinematica import (
+    construir_cinematica, muestras_validas, muestras_suavizadas, distancias,
+    matriz_por_frame, sumas_acumuladas, orden_jugadores, UMBRALES_VELOCIDAD_KMH
+)
+from metricas.colectivas.potencia_metabolica import potencia_muestras
+
+VENTANAS_MINUTOS = (1, 3, 5, 10)
+UMBRAL_ALTA_VELOCIDAD_KMH = UMBRALES_VELOCIDAD_KMH[2]   # carrera a alta velocidad o más (> 20 km/h)
+PRESENCIA_MINIMA = 0.9     # fracción mínima de frames de la ventana en los que debe aparecer el jugador
+
+# Series por frame que se acumulan en cada ventana: nombre de la columna -> clave interna
+PICOS = {
+    'peakDistance': 'distancia',
+    'peakHighSpeedDistance': 'distancia_alta_velocidad',
+    'peakHMLD': 'hmld',
+    'peakPower': 'potencia',
+}
+
+
+def series_por_frame(cinematica, frame_duration):
+    """
+    Matrices frames x jugadores con la distancia recorrida (total y a alta velocidad, sobre
+    posiciones suavizadas), la distancia con carga metabólica alta (HMLD), la potencia
+    metabólica y la presencia del jugador en cada frame. Los frames con cambio de periodo
+    no suman nada.
+    """
+    n_frames = len(cinematica['periodo'])
+    n_jugadores = len(cinematica['jugadores'])
+
+    suavizadas = muestras_suavizadas(cinematica, envolvente=False)
+    distancia = distancias(suavizadas['x'], suavizadas['y'], suavizadas['inicio'])
+    alta_velocidad = suavizadas['speed'] * 3.6 > UMBRAL_ALTA_VELOCIDAD_KMH
+
+    validas = muestras_validas(cinematica, envolvente=False)
+    potencia, distancia_potencia, alta = potencia_muestras(validas, frame_duration)
+
+    return {
+        'distancia': matriz_por_frame(distancia, suavizadas, n_frames, n_jugadores),
+        'distancia_alta_velocidad': matriz_por_frame(
+            np.where(alta_velocidad, distancia, 0.0), suavizadas, n_frames, n_jugadores
+        ),
+        'hmld': matriz_por_frame(np.where(alta, distancia_potencia, 0.0), validas, n_frames, n_jugadores),
+        'potencia': matriz_por_frame(potencia, validas, n_frames, n_jugadores),
+        'presencia': matriz_por_frame(1.0, validas, n_frames, n_jugadores),
+    }
+
+
+def calcular_picos(acumuladas, periodo, longitud):
+    """
+    Máximo por jugador de la suma de cada serie en las ventanas de `longitud` frames
+    contenidas en un único periodo y en las que el jugador aparece en al menos
+    PRESENCIA_MINIMA de los frames. La potencia se da como media de los frames presentes.
+
+    Args:
+        acumuladas: Sumas acumuladas (ver sumas_acumuladas) de cada serie de series_por_frame.
+        periodo: Periodo de cada frame.
+        longitud: Longitud de la ventana en frames.
+
+    Returns:
+        Diccionario clave interna -> array (P,) con NaN si el jugador no tiene ninguna ventana válida.
+    """
+    periodo = np.asarray(periodo)
+    n_jugadores = acumuladas['presencia'].shape[1]
+    if longitud > len(periodo):
+        return {clave: np.full(n_jugadores, np.nan) for clave in PICOS.values()}
+
+    # Los periodos son consecutivos: la ventana [t, t + longitud) es válida si empieza y acaba en el mismo
+    mismo_periodo = periodo[:len(periodo) - longitud + 1] == periodo[longitud - 1:]
+
+    def ventanas(clave):
+        return acumuladas[clave][longitud:] - acumuladas[clave][:-longitud]
+
+    presencia = ventanas('presencia')
+    validas = mismo_periodo[:, None] & (presencia >= PRESENCIA_MINIMA * longitud)
+    con_ventana = validas.any(axis=0)
+
+    picos = {}
+    for clave in PICOS.values():
+        sumas = ventanas(clave)
+        if clave == 'potencia':
+            with np.errstate(invalid='ignore', divide='ignore'):
+                sumas = sumas / presencia
+        maximos = np.where(validas, sumas, -np.inf).max(axis=0)
+        picos[clave] = np.where(con_ventana, maximos, np.nan)
+    return picos
+
+
+def picos_intensidad(data, frame_duration, ventanas_minutos=VENTANAS_MINUTOS):
+    """
+    Peor escenario (worst-case scenario) de cada jugador: máxima distancia, distancia a alta
+    velocidad, HMLD y potencia metabólica media en ventanas móviles de 1, 3, 5 y 10 minutos.
+
+    Las sumas acumuladas de las series por frame se calculan una vez; cada longitud de
+    ventana es después una resta y un máximo por jugador. Las ventanas no cruzan el cambio de periodo.
+
+    Returns:
+        DataFrame con 'playerId' y una columna por métrica y ventana, p.ej. 'peakHMLD_5min'.
+    """
+    cinematica = construir_cinematica(data)
+    series = series_por_frame(cinematica, frame_duration)
+    acumuladas = {clave: sumas_acumuladas(serie) for clave, serie in series.items()}
+
+    codigos = orden_jugadores(muestras_validas(cinematica, envolvente=False))
+    df = pd.DataFrame({'playerId': cinematica['codigos'][codigos]})
+    for minutos in ventanas_minutos:
+        longitud = int(round(minutos * 60 / frame_duration))
+        picos = calcular_picos(acumuladas, cinematica['periodo'], longitud)
+        for columna, clave in PICOS.items():
+            df[f'{columna}_{minutos}min'] = picos[clave][codigos].round(2)
+    return df
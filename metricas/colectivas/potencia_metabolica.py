@@ -1,153 +1,75 @@
-import math
+import numpy as np
 import pandas as pd
 
+from metricas.cinematica import (
+    construir_cinematica, muestras_validas, anterior, distancias,
+    sumar_por_jugador, detectar_esfuerzos, orden_jugadores
+)
 
+# Constantes del modelo de potencia metabólica
+C1 = 15.5
+C2 = 0.21
+C3 = 0.004
+UMBRAL_POTENCIA_ALTA = 25.5   # W/kg a partir de los que se considera carga metabólica alta
 
 
+def potencia_metabolica(velocidad, aceleracion):
+    """Potencia metabólica instantánea (solo cuenta la aceleración positiva)."""
+    aceleracion = np.maximum(0, aceleracion)
+    return (
+        C1 + C2 * velocidad + C3 * velocidad ** 3
+        + aceleracion * (0.43 * velocidad + 0.32 * velocidad ** 2 + 0.008 * velocidad ** 3)
+    )
 
-def pot_metabolica(data, frame_duration):
-  """Calcula HMLD, HMLe y Power Metabolic AVG."""
-  player_metrics = {}
-
-  for frame_index, frame in enumerate(data):
-
-    frame = data[frame_index]
-    previous_frame = data[frame_index - 1]
-
-
-    current_period = frame.get('period')
-    previous_period = previous_frame.get('period')
-
-
-    if current_period != previous_period: # Salta si hay un cambio de parte
-        continue
-
-
-    for player in frame['homePlayers'] + frame['awayPlayers']:
-      player_id = player['playerId']
-      speed = player['speed']
-      current_position = tuple(player['xyz'])
-
-
-
-      # Inicializa métricas para el jugador si no existe:
-      if player_id not in player_metrics:
-        player_metrics[player_id] = {
-            'potencia_metabolica_total': 0,
-            'num_frames': 0,
-            'HMLD': 0,
-            'HMLe': 0,
-            'in_effort_hm': False,
-            'previous_speed': 0,
-            'previous_position': None
-        }
-
-
-
-      acceleration = (speed - player_metrics[player_id]['previous_speed']) / frame_duration
-
-      velocidad = speed
-      C1 = 15.5
-      C2 = 0.21
-      C3 = 0.004
-      aceleracion = max(0, acceleration)
-      potencia_metabolica = C1 + C2 * velocidad + C3 * velocidad ** 3 + aceleracion * (0.43 * velocidad + 0.32 * velocidad ** 2 + 0.008 * velocidad ** 3)
-
-
-      # Calcula la distancia desde la posición anterior
-      distance = 0
-      if player_metrics[player_id]['previous_position'] is not None:
-            previous_pos = player_metrics[player_id]['previous_position']
-            distance = math.dist(previous_pos, current_position)
-
-
-      player_metrics[player_id]['potencia_metabolica_total'] += potencia_metabolica
-      player_metrics[player_id]['num_frames'] += 1
-
-      if potencia_metabolica > 25.5:
-          player_metrics[player_id]['HMLD'] += distance
-          if not player_metrics[player_id]['in_effort_hm']:
-              player_metrics[player_id]['HMLe'] += 1
-              player_metrics[player_id]['in_effort_hm'] = True
-      else:
-          player_metrics[player_id]['in_effort_hm'] = False
-
-
-
-      # Actualiza la posición y velocidad previas
-      player_metrics[player_id]['previous_position'] = current_position
-      player_metrics[player_id]['previous_speed'] = speed
-
-
-
-
-
-  # Calcula Power Metabolic AVG
-  for player_id, metrics in player_metrics.items():
-    metrics['Power_Metabolic_AVG'] = metrics['potencia_metabolica_total'] / metrics['num_frames']
-
-  table_data = []
-  for player_id, metrics in player_metrics.items():
-      table_data.append({
-          'playerId': player_id,
-          'HMLD': round(metrics['HMLD'], 2),
-          'HMLe': metrics['HMLe'],
-          'Power_Metabolic_AVG': round(metrics['Power_Metabolic_AVG'], 2)
-      })
-
-
-  df = pd.DataFrame(table_data)
-  return df
 
+def potencia_muestras(muestras, frame_duration):
+    """
+    Potencia metabólica, distancia y máscara de carga alta de cada muestra.
 
+    La aceleración de la primera muestra de cada jugador se calcula respecto a velocidad 0
+    y su distancia es 0, igual que en el bucle original.
 
+    Returns:
+        (potencia, distancia, alta), arrays alineados con las muestras.
+    """
+    inicio = muestras['inicio']
+    speed = muestras['speed']
+    aceleracion = (speed - anterior(speed, inicio, 0.0)) / frame_duration
+    potencia = potencia_metabolica(speed, aceleracion)
+    distancia = distancias(muestras['x'], muestras['y'], inicio)
+    return potencia, distancia, potencia > UMBRAL_POTENCIA_ALTA
 
 
+def calcular_potencia_muestras(muestras, frame_duration, n_jugadores):
+    """
+    Calcula HMLD, HMLe y potencia media sobre las muestras de uno o varios jugadores.
 
+    Returns:
+        Diccionario de arrays por código de jugador: 'HMLD', 'HMLe', 'potencia_total', 'num_frames'.
+    """
+    potencia, distancia, alta = potencia_muestras(muestras, frame_duration)
+    esfuerzos = detectar_esfuerzos(alta, muestras['inicio'])['comienzo']
+    codigo = muestras['codigo']
 
+    return {
+        'HMLD': sumar_por_jugador(np.where(alta, distancia, 0.0), codigo, n_jugadores),
+        'HMLe': sumar_por_jugador(esfuerzos, codigo, n_jugadores).astype(int),
+        'potencia_total': sumar_por_jugador(potencia, codigo, n_jugadores),
+        'num_frames': np.bincount(codigo, minlength=n_jugadores),
+    }
 
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-# COMPARAR ENTRE PARTES
-
-"""
-metricas_por_partes = calcular_metricas_por_partes(data_5hz, 0.2)
-
-# Mostrar resultados por partes
-for period, df in metricas_por_partes.items():
-    print(f"\nMétricas para el período {period}:")
-    display(df) """
-
-
-
-  # INTERVALOS DE 5 MIN
-
-"""
-
-metricas_por_intervalo = calcular_metricas_por_intervalo(data_5hz, 0.2, 5) # 5 MINUTOS
-
-# Mostrar resultados por intervalo
-for interval, df in metricas_por_intervalo.items():
-    print(f"\n📊 Métricas para el intervalo {interval}:")
-    display(df)  # Asegura que todas las métricas sean visibles """
\ No newline at end of file
+def pot_metabolica(data, frame_duration):
+    """Calcula HMLD, HMLe y Power Metabolic AVG."""
+    cinematica = construir_cinematica(data)
+    muestras = muestras_validas(cinematica)
+    metricas = calcular_potencia_muestras(muestras, frame_duration, len(cinematica['jugadores']))
+
+    codigos = orden_jugadores(muestras)
+    df = pd.DataFrame({
+        'playerId': cinematica['codigos'][codigos],
+        'HMLD': metricas['HMLD'][codigos].round(2),
+        'HMLe': metricas['HMLe'][codigos],
+        'Power_Metabolic_AVG': (metricas['potencia_total'][codigos] / metricas['num_frames'][codigos]).round(2),
+    })
+    return df
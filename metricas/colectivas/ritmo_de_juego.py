@@ -1,90 +1,52 @@
-
-import math
-import pandas as pd
 import numpy as np
-import math
-from scipy.signal import savgol_filter
-
-
-
-
-
-
-
-def ritmo_juego(data, frame_duration):
-    player_data = {}
-
-    for frame_index, frame in enumerate(data):
-        previous_frame = data[frame_index - 1] if frame_index > 0 else {}
-        current_period = frame.get('period')
-        previous_period = previous_frame.get('period')
-
-        if current_period != previous_period:
-            continue
-
-        for player in frame['homePlayers'] + frame['awayPlayers']:
-            player_id = player['playerId']
-            x, y = player['xyz'][0], player['xyz'][1]
-            speed = player['speed']
-
-            if player_id not in player_data:
-                player_data[player_id] = {
-                    'x_coords': [], 'y_coords': [], 'speeds': [],
-                    'walkingDistance': 0, 'joggingDistance': 0,
-                    'lowSpeedRunningDistance': 0, 'highSpeedRunningDistance': 0,
-                    'sprintDistance': 0, 'veryHighSpeedDistance': 0,
-                }
-
-            player_data[player_id]['x_coords'].append(x)
-            player_data[player_id]['y_coords'].append(y)
-            player_data[player_id]['speeds'].append(speed)
-
-    table_data = []
+import pandas as pd
 
-    for player_id, info in player_data.items():
-        x_coords = np.array(info['x_coords'])
-        y_coords = np.array(info['y_coords'])
-        speeds = np.array(info['speeds'])
+from metricas.cinematica import (
+    construir_cinematica, muestras_suavizadas, distancias, zona_velocidad,
+    sumar_por_jugador, orden_jugadores
+)
 
-        if len(x_coords) >= 3:
-            x_smooth = savgol_filter(x_coords, 3, 1)
-            y_smooth = savgol_filter(y_coords, 3, 1)
-            speeds_smooth = savgol_filter(speeds, 3, 1)
-        else:
-            x_smooth, y_smooth, speeds_smooth = x_coords, y_coords, speeds
+ZONAS_RITMO = [
+    'walkingRhythm', 'joggingRhythm', 'lowSpeedRunningRhythm',
+    'highSpeedRunningRhythm', 'sprintRhythm', 'veryHighSpeedRhythm'
+]
 
-        total_distance = 0
-        walking = jogging = low_run = high_run = sprint = very_high = 0
 
-        for i in range(1, len(x_smooth)):
-            d = math.dist([x_smooth[i-1], y_smooth[i-1]], [x_smooth[i], y_smooth[i]])
-            total_distance += d
+def calcular_distancias_zonas(muestras, n_jugadores):
+    """
+    Distancia total y por zona estándar de velocidad de cada jugador sobre muestras ya suavizadas.
+    La zona de cada tramo la marca la velocidad de la muestra final del tramo.
 
-            v_kmh = speeds_smooth[i] * 3.6
-            if v_kmh < 7:
-                walking += d
-            elif v_kmh <= 15:
-                jogging += d
-            elif v_kmh <= 20:
-                low_run += d
-            elif v_kmh <= 25:
-                high_run += d
-            elif v_kmh <= 30:
-                sprint += d
-            else:
-                very_high += d
+    Returns:
+        (distancia_total (P,), distancia_por_zona (P x 6))
+    """
+    codigo = muestras['codigo']
+    distancia = distancias(muestras['x'], muestras['y'], muestras['inicio'])
+    zona = zona_velocidad(muestras['speed'] * 3.6)
 
-        playing_time = len(info['x_coords']) * frame_duration / 60  # en minutos
+    total = sumar_por_jugador(distancia, codigo, n_jugadores)
+    por_zona = np.bincount(
+        codigo * len(ZONAS_RITMO) + zona, weights=distancia, minlength=n_jugadores * len(ZONAS_RITMO)
+    ).reshape(n_jugadores, len(ZONAS_RITMO))
+    return total, por_zona
 
-        table_data.append({
-            'playerId': player_id,
-            'playingTime': playing_time,
-            'walkingRhythm': walking / playing_time if playing_time else 0,
-            'joggingRhythm': jogging / playing_time if playing_time else 0,
-            'lowSpeedRunningRhythm': low_run / playing_time if playing_time else 0,
-            'highSpeedRunningRhythm': high_run / playing_time if playing_time else 0,
-            'sprintRhythm': sprint / playing_time if playing_time else 0,
-            'veryHighSpeedRhythm': very_high / playing_time if playing_time else 0
-        })
 
-    return pd.DataFrame(table_data)
\ No newline at end of file
+def ritmo_juego(data, frame_duration):
+    cinematica = construir_cinematica(data)
+    # Aquí el primer frame nunca se procesa (no se compara con el último)
+    muestras = muestras_suavizadas(cinematica, envolvente=False)
+    n_jugadores = len(cinematica['jugadores'])
+
+    _, por_zona = calcular_distancias_zonas(muestras, n_jugadores)
+    num_frames = np.bincount(muestras['codigo'], minlength=n_jugadores)
+
+    codigos = orden_jugadores(muestras)
+    playing_time = num_frames[codigos] * frame_duration / 60  # en minutos
+
+    df = pd.DataFrame({
+        'playerId': cinematica['codigos'][codigos],
+        'playingTime': playing_time,
+    })
+    for i, columna in enumerate(ZONAS_RITMO):
+        df[columna] = por_zona[codigos, i] / playing_time
+    return df
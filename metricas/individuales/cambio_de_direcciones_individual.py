@@ -1,94 +1,64 @@
 import numpy as np
 import pandas as pd
 
+from servicios.almacen_tracking import es_columnar
+from metricas.colectivas.cambio_de_direcciones import (
+    COLUMNAS_CAMBIOS, categorizar_angulos, detectar_cambios_direccion
+)
+from metricas.individuales.trayectoria import extraer_trayectoria, muestras_trayectoria
+
+
 def calcular_velocidades_individual(data, player_id, frame_duration=0.2):
     """
     Calcula la velocidad únicamente para el jugador especificado (player_id).
 
     Args:
-        data: Lista de diccionarios con datos de seguimiento (cada frame).
+        data: Lista de diccionarios con datos de seguimiento (cada frame) o partido columnar.
         player_id: ID del jugador cuyo vector de velocidades queremos calcular.
         frame_duration: Duración de un frame en segundos.
 
     Returns:
-        new_data: Lista de diccionarios igual al dataset original, pero con
+        new_data: Mismo dataset que el original (lista de frames o partido columnar), pero con
                   la clave 'speed' solo actualizada para el player_id; el resto
                   de jugadores tendrá 'speed'=0 o conserva su valor previo si
-                  existiera.
+                  existiera. Los frames y jugadores que no cambian no se copian.
     """
-    # 1) Recoger todas las posiciones (x, y) de este player_id a lo largo de los frames
-    x_vals = []
-    y_vals = []
-
-    # También guardamos el índice de frame para reconstruir luego
-    # Si en un frame no aparece, guardamos None (se asumirá velocidad 0)
-    frame_indices = []
-
+    trayectoria = extraer_trayectoria(data, player_id)
+
+    # 1) Velocidad solo en los instantes en que el jugador aparece consecutivamente
+    x, y, presente = trayectoria['x'], trayectoria['y'], trayectoria['presente']
+    speeds = np.zeros(len(x))  # velocidad 0 para el primer frame o ausencias
+    consecutivos = presente[1:] & presente[:-1]
+    dx = x[1:] - x[:-1]
+    dy = y[1:] - y[:-1]
+    speeds[1:] = np.where(consecutivos, np.sqrt(dx * dx + dy * dy) / frame_duration, 0.0)
+
+    # 2) Partido columnar: basta con sustituir la columna del jugador
+    if es_columnar(data):
+        speed = np.array(data['speed'])
+        if player_id in data['jugadores']:
+            speed[:, data['jugadores'].index(player_id)] = speeds
+        new_data = dict(data, speed=speed)
+        # Ya no son los datos del fichero: sin huella no se usan resultados en caché
+        new_data.pop('huella', None)
+        return new_data
+
+    # 3) Lista de frames: solo se copian los jugadores cuya velocidad cambia
+    new_data = []
     for idx, frame in enumerate(data):
+        new_frame = dict(frame)
         encontrado = False
-
-        # Buscar dentro de homePlayers y awayPlayers
         for player_type in ('homePlayers', 'awayPlayers'):
+            jugadores = []
             for p in frame[player_type]:
-                if p['playerId'] == player_id:
-                    x_vals.append(p['xyz'][0])
-                    y_vals.append(p['xyz'][1])
-                    frame_indices.append(idx)
+                if p['playerId'] == player_id and not encontrado:
+                    # Si hubiera varias apariciones en el frame, cuenta la primera
+                    p = dict(p, speed=speeds[idx])
                     encontrado = True
-                    break
-            if encontrado:
-                break
-
-        if not encontrado:
-            # Si no encontramos al jugador en este frame, metemos un marcador
-            x_vals.append(None)
-            y_vals.append(None)
-            frame_indices.append(idx)
-
-    # 2) Calcular velocidades solo en los instantes en que el jugador aparece consecutivamente
-    speeds = [0.0] * len(x_vals)  # velocidad 0 por defecto para el primer frame o ausencias
-
-    # Recorremos y calculamos diferencias siempre que tengamos dos posiciones consecutivas válidas
-    for i in range(1, len(x_vals)):
-        if x_vals[i] is None or x_vals[i-1] is None:
-            speeds[i] = 0.0
-        else:
-            dx = x_vals[i] - x_vals[i-1]
-            dy = y_vals[i] - y_vals[i-1]
-            speed = np.sqrt(dx * dx + dy * dy) / frame_duration
-            speeds[i] = speed
-
-    # 3) Reconstruir new_data: para cada frame, asignar velocidad solo a este player_id
-    new_data = []
-    # Llevamos contador de cuántas veces hemos añadido un speed no nulo
-    # (en realidad, speeds[i] ya está alineado con frame_indices[i])
-    # Pero si en un mismo frame hubiera múltiples apariciones (no debería),
-    # tomamos el primero que coincida
-    for idx, frame in enumerate(data):
-        new_frame = {k: v if k not in ('homePlayers', 'awayPlayers') else [] for k, v in frame.items()}
-
-        # Índice en speeds/formas de x_vals coincide con idx vía frame_indices
-        # Lo localizamos:
-        pos_list = [pos for pos, fidx in enumerate(frame_indices) if fidx == idx]
-        speed_val = 0.0
-        if len(pos_list) > 0:
-            # Debe haber exactamente uno, pero tomamos el primero
-            speed_val = speeds[pos_list[0]]
-        else:
-            speed_val = 0.0
-
-        # Reconstruimos homePlayers y awayPlayers
-        for player_type in ('homePlayers', 'awayPlayers'):
-            for p in frame[player_type]:
-                new_p = p.copy()
-                if p['playerId'] == player_id:
-                    new_p['speed'] = speed_val
-                else:
-                    # Si existía algún valor previo en 'speed', lo dejamos; 
-                    # sino forzamos a 0
-                    new_p['speed'] = p.get('speed', 0.0)
-                new_frame[player_type].append(new_p)
-
+                elif 'speed' not in p:
+                    p = dict(p, speed=0.0)
+                jugadores.append(p)
+            new_frame[player_type] = jugadores
         new_data.append(new_frame)
 
     return new_data
@@ -100,7 +70,8 @@ def cambios_direccion_individual(data, player_id, frame_duration=0.2,
     Calcula los cambios de dirección únicamente para el jugador especificado.
 
     Args:
-        data: Lista de diccionarios con datos de seguimiento (ya con 'speed' calculado).
+        data: Lista de diccionarios con datos de seguimiento (ya con 'speed' calculado),
+              partido columnar o trayectoria ya extraída del jugador.
         player_id: ID del jugador al que queremos limitar el cálculo.
         frame_duration: Duración de un frame en segundos.
         min_speed: Velocidad mínima en m/s para considerar un cambio de dirección.
@@ -111,96 +82,19 @@ def cambios_direccion_individual(data, player_id, frame_duration=0.2,
                     de ese único jugador (columns: playerId, frame, speed, acceleration,
                     angle_change, category).
     """
-    player_changes = []
-
-    # Para cada frame (empezamos en 1 para comparar con anterior)
-    for frame_index in range(1, len(data)):
-        frame = data[frame_index]
-        prev_frame = data[frame_index - 1]
-
-        # Si hay cambio de periodo, saltamos
-        if frame.get('period') != prev_frame.get('period'):
-            continue
-
-        # Buscar al jugador actual en el frame
-        current_player = None
-        for p in frame['homePlayers'] + frame['awayPlayers']:
-            if p['playerId'] == player_id:
-                current_player = p
-                break
-        if current_player is None:
-            continue
-
-        # Buscar al jugador en el frame anterior
-        previous_player = None
-        for p in prev_frame['homePlayers'] + prev_frame['awayPlayers']:
-            if p['playerId'] == player_id:
-                previous_player = p
-                break
-        if previous_player is None:
-            continue
-
-        # Extraer posiciones (solo x,y) y velocidades
-        current_position = np.array(current_player['xyz'][:2])
-        previous_position = np.array(previous_player['xyz'][:2])
-        current_speed = current_player.get('speed', 0.0)
-        previous_speed = previous_player.get('speed', 0.0)
-
-        # Cálculo de aceleración
-        velocity_change = current_speed - previous_speed
-        acceleration = velocity_change / frame_duration
-
-        # Si no cumple mínimos, saltamos
-        if current_speed < min_speed or abs(acceleration) < min_acceleration:
-            continue
-
-        # Vector de dirección actual
-        current_direction = current_position - previous_position
-
-        # Buscamos la posición un frame atrás que sea distinta, para vector previo
-        prev_frame_idx = frame_index - 1
-        previous_position_2 = None
-        while prev_frame_idx > 0 and previous_position_2 is None:
-            candidate = None
-            for p in data[prev_frame_idx]['homePlayers'] + data[prev_frame_idx]['awayPlayers']:
-                if p['playerId'] == player_id:
-                    candidate = np.array(p['xyz'][:2])
-                    break
-            if candidate is not None and not np.array_equal(candidate, previous_position):
-                previous_position_2 = candidate
-                break
-            prev_frame_idx -= 1
-
-        if previous_position_2 is not None:
-            previous_direction = previous_position - previous_position_2
-        else:
-            previous_direction = np.array([0.0, 0.0])
-
-        # Cálculo del ángulo entre vectores
-        angle_rad = np.arctan2(current_direction[1], current_direction[0]) \
-                    - np.arctan2(previous_direction[1], previous_direction[0])
-        angle_deg = abs(np.degrees(angle_rad))
-
-        # Categorizar por rango de ángulo
-        if 0 < angle_deg < 45:
-            category = '<45º'
-        elif 45 <= angle_deg < 90:
-            category = '45-90º'
-        elif 90 <= angle_deg < 135:
-            category = '90-135º'
-        elif 135 <= angle_deg <= 180:
-            category = '135-180º'
-        else:
-            category = 'other'
-
-        player_changes.append({
-            'playerId': player_id,
-            'frame': frame_index,
-            'speed': current_speed,
-            'acceleration': acceleration,
-            'angle_change': angle_deg,
-            'category': category
-        })
-
-    df_changes = pd.DataFrame(player_changes)
+    trayectoria = extraer_trayectoria(data, player_id)
+    muestras = muestras_trayectoria(trayectoria, trayectoria['presente'])
+    periodo = trayectoria['periodo'][muestras['frame']]
+
+    cambios = detectar_cambios_direccion(muestras, periodo, frame_duration, min_speed, min_acceleration)
+    indice = cambios['indice']
+
+    df_changes = pd.DataFrame({
+        'playerId': [player_id] * len(indice),
+        'frame': muestras['frame'][indice],
+        'speed': muestras['speed'][indice],
+        'acceleration': cambios['acceleration'],
+        'angle_change': cambios['angle_change'],
+        'category': categorizar_angulos(cambios['angle_change'], otro='other'),
+    }, columns=COLUMNAS_CAMBIOS)
     return df_changes
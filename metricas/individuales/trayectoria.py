@@ -0,0 +1,99 @@
+import numpy as np
+
+from servicios.almacen_tracking import es_columnar
+from metricas.cinematica import crear_muestras, frames_mismo_periodo
+
+
+def es_trayectoria(data):
+    return isinstance(data, dict) and data.get('tipo') == 'trayectoria'
+
+
+def extraer_trayectorias(data, player_ids):
+    """
+    Extrae en una sola pasada las trayectorias de uno o varios jugadores.
+
+    Args:
+        data: Lista de frames o partido columnar.
+        player_ids: IDs de los jugadores a extraer.
+
+    Returns:
+        Diccionario player_id -> trayectoria. Cada trayectoria tiene arrays alineados con
+        los frames de `data`: 'frame' (índice del frame), 'periodo', 'x', 'y', 'speed'
+        (NaN cuando el jugador no aparece) y 'presente' (máscara de presencia).
+    """
+    player_ids = list(dict.fromkeys(player_ids))
+
+    if es_columnar(data):
+        periodo = np.asarray(data['periodo'])
+        codigos = {pid: codigo for codigo, pid in enumerate(data['jugadores'])}
+        columnas = {}
+        for campo in ('x', 'y', 'speed'):
+            matriz = np.full((len(periodo), len(player_ids)), np.nan)
+            for k, pid in enumerate(player_ids):
+                if pid in codigos:
+                    matriz[:, k] = data[campo][:, codigos[pid]]
+            columnas[campo] = matriz
+    else:
+        indices = {pid: k for k, pid in enumerate(player_ids)}
+        periodo = np.zeros(len(data), dtype=np.int16)
+        columnas = {campo: np.full((len(data), len(player_ids)), np.nan) for campo in ('x', 'y', 'speed')}
+        for fila, frame in enumerate(data):
+            periodo[fila] = frame.get('period') or 0
+            for player in frame['homePlayers'] + frame['awayPlayers']:
+                k = indices.get(player['playerId'])
+                # Si un jugador apareciera dos veces en el frame, cuenta la primera
+                if k is None or not np.isnan(columnas['x'][fila, k]):
+                    continue
+                columnas['x'][fila, k] = player['xyz'][0]
+                columnas['y'][fila, k] = player['xyz'][1]
+                columnas['speed'][fila, k] = player.get('speed', 0.0)
+
+    frames = np.arange(len(periodo))
+    trayectorias = {}
+    for k, pid in enumerate(player_ids):
+        x = columnas['x'][:, k]
+        trayectorias[pid] = {
+            'tipo': 'trayectoria',
+            'playerId': pid,
+            'frame': frames,
+            'periodo': periodo,
+            'x': x,
+            'y': columnas['y'][:, k],
+            'speed': columnas['speed'][:, k],
+            'presente': ~np.isnan(x),
+        }
+    return trayectorias
+
+
+def extraer_trayectoria(data, player_id):
+    """
+    Trayectoria de un único jugador (ver extraer_trayectorias). Si `data` ya es una
+    trayectoria se devuelve tal cual.
+    """
+    if es_trayectoria(data):
+        return data
+    return extraer_trayectorias(data, [player_id])[player_id]
+
+
+def frames_individuales(trayectoria, incluir_primero=True):
+    """
+    Máscara de frames que procesan las métricas individuales: el jugador aparece y no hay
+    cambio de periodo respecto al frame anterior. El primer frame se incluye si el jugador aparece.
+    """
+    validos = frames_mismo_periodo(trayectoria['periodo'], envolvente=False)
+    if incluir_primero and len(validos):
+        validos[0] = True
+    return validos & trayectoria['presente']
+
+
+def muestras_trayectoria(trayectoria, seleccion):
+    """
+    Muestras (ver metricas/cinematica.py) de los frames seleccionados de una trayectoria,
+    con código de jugador 0.
+    """
+    frame = trayectoria['frame'][seleccion]
+    return crear_muestras(
+        np.zeros(len(frame), dtype=np.intp), frame,
+        trayectoria['x'][seleccion], trayectoria['y'][seleccion],
+        np.nan_to_num(trayectoria['speed'][seleccion])
+    )
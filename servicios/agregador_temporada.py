@@ -0,0 +1,143 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from servicios.procesa_partidos import cargar_partido, calcular_metricas
+from servicios.indice_partidos import actualizar_indice, SUFIJO_CARPETA
+from servicios.almacen_tracking import preparar_almacenes
+from servicios.jugadores import restaurar_ids
+from metricas.colectivas.metricas_seleccionadas import combinar_metricas_seleccionadas, COLUMNAS_SELECCIONADAS
+
+RUTA_METRICAS_CON_NOMBRES = 'config/metricas_con_nombres.csv'
+
+
+def metricas_partido_jugadores(ruta_data, player_ids, min_minutes=70):
+    """
+    Métricas seleccionadas de todos los jugadores de un partido en una sola pasada
+    (cada familia se calcula una vez para todo el partido y se reutiliza la caché de resultados).
+
+    Args:
+        ruta_data: Ruta del JSONL de tracking del partido.
+        player_ids: Jugadores que interesan (el resto se descarta).
+        min_minutes: Minutos mínimos jugados para contar el partido.
+
+    Returns:
+        DataFrame con 'playerId', 'playingTime' y COLUMNAS_SELECCIONADAS (vacío si hay algún
+        error: el partido no cuenta en la media de la temporada).
+    """
+    try:
+        resultados = calcular_metricas(cargar_partido(ruta_data, procesos=1), ['ritmo', 'aceleraciones', 'umbral_est', 'umbral_rel'])
+        df = combinar_metricas_seleccionadas(
+            resultados['ritmo'], resultados['aceleraciones'], resultados['umbral_est'], resultados['umbral_rel'],
+            min_minutes, incluir_minutos=True
+        )
+        # Los códigos de jugador no se comparten entre procesos: se devuelven los playerId
+        df = restaurar_ids(df)
+    except Exception as e:
+        print(f"Error procesando {ruta_data}: {e}")
+        return pd.DataFrame(columns=['playerId', 'playingTime'] + COLUMNAS_SELECCIONADAS)
+    df = df[df['playerId'].isin(set(player_ids))]
+    return df[['playerId', 'playingTime'] + COLUMNAS_SELECCIONADAS].reset_index(drop=True)
+
+
+def acumular_partido(acumulados, df_partido):
+    """
+    Suma las métricas de un partido a los acumulados por jugador (sin guardar las tablas
+    de cada partido): número de partidos, minutos, suma y suma ponderada por minutos.
+    """
+    valores = df_partido[COLUMNAS_SELECCIONADAS].to_numpy(dtype=float)
+    minutos = df_partido['playingTime'].to_numpy(dtype=float)
+    for player_id, fila, min_jugados in zip(df_partido['playerId'], valores, minutos):
+        acumulado = acumulados.get(player_id)
+        if acumulado is None:
+            acumulado = acumulados[player_id] = {
+                'partidos': 0,
+                'minutos': 0.0,
+                'suma': np.zeros(len(COLUMNAS_SELECCIONADAS)),
+                'suma_ponderada': np.zeros(len(COLUMNAS_SELECCIONADAS)),
+            }
+        acumulado['partidos'] += 1
+        acumulado['minutos'] += min_jugados
+        acumulado['suma'] += fila
+        acumulado['suma_ponderada'] += fila * min_jugados
+    return acumulados
+
+
+def _metricas_partido(argumentos):
+    return metricas_partido_jugadores(*argumentos)
+
+
+def promediar_temporada(player_ids, base_datos='datos', min_minutes=70, procesos=None, ponderar_minutos=False,
+                        progreso=None):
+    """
+    Promedia las métricas seleccionadas de cada jugador en todos sus partidos de la temporada,
+    repartiendo los partidos entre varios procesos.
+
+    Args:
+        player_ids: Jugadores a promediar.
+        base_datos: Carpeta con los partidos.
+        min_minutes: Minutos mínimos jugados para que un partido cuente.
+        procesos: Número de procesos (None = todos los núcleos, 1 = sin pool).
+        ponderar_minutos: Si es True, media ponderada por minutos jugados; si no, media simple por partido.
+        progreso: Función opcional llamada como progreso(terminados, total, ruta_data) al
+                  terminar cada partido.
+
+    Returns:
+        DataFrame con 'playerId', 'partidos', 'minutos' y COLUMNAS_SELECCIONADAS, en el orden de `player_ids`.
+    """
+    player_ids = list(player_ids)
+    seleccionados = set(player_ids)
+
+    # Partidos con algún jugador seleccionado, usando el índice de participación
+    tareas = []
+    for carpeta, partido in sorted(actualizar_indice(base_datos)['partidos'].items()):
+        jugadores = seleccionados.intersection(partido['jugadores'])
+        match_id = carpeta.replace(SUFIJO_CARPETA, '')
+        ruta_data = os.path.join(base_datos, carpeta, f"{match_id}_SecondSpectrum_Data.jsonl")
+        if jugadores and os.path.exists(ruta_data):
+            tareas.append((ruta_data, sorted(jugadores), min_minutes))
+
+    acumulados = {}
+    # Los JSONL sin almacén se decodifican aquí, uno a uno, antes de repartir los partidos
+    preparar_almacenes([ruta_data for ruta_data, _, _ in tareas], procesos)
+    procesos = min(procesos or os.cpu_count() or 1, max(len(tareas), 1))
+
+    def acumular(resultados):
+        for terminados, ((ruta_data, _, _), df_partido) in enumerate(zip(tareas, resultados), start=1):
+            acumular_partido(acumulados, df_partido)
+            if progreso is not None:
+                progreso(terminados, len(tareas), ruta_data)
+
+    if procesos <= 1:
+        acumular(map(_metricas_partido, tareas))
+    else:
+        # map devuelve los partidos en orden: las sumas no dependen de qué proceso termine antes
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            acumular(pool.map(_metricas_partido, tareas))
+
+    filas = []
+    for player_id in player_ids:
+        acumulado = acumulados.get(player_id)
+        if acumulado is None:
+            continue
+        if ponderar_minutos and acumulado['minutos'] > 0:
+            medias = acumulado['suma_ponderada'] / acumulado['minutos']
+        else:
+            medias = acumulado['suma'] / acumulado['partidos']
+        filas.append([player_id, acumulado['partidos'], acumulado['minutos']] + list(medias))
+
+    return pd.DataFrame(filas, columns=['playerId', 'partidos', 'minutos'] + COLUMNAS_SELECCIONADAS)
+
+
+def guardar_metricas_con_nombres(df_temporada, diccionario, ruta=RUTA_METRICAS_CON_NOMBRES):
+    """
+    Escribe el CSV que usan el clustering y el grafo de similitud: columna 'Jugador' con el
+    nombre del jugador seguida de COLUMNAS_SELECCIONADAS.
+    """
+    df = df_temporada[['playerId'] + COLUMNAS_SELECCIONADAS].copy()
+    df.insert(0, 'Jugador', df.pop('playerId').map(diccionario))
+    df = df.dropna(subset=['Jugador'])
+    df.to_csv(ruta, index=False)
+    return df
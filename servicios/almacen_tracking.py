@@ -0,0 +1,610 @@
+import os
+import json
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+
+VERSION_ALMACEN = 3
+EXTENSION_ALMACEN = ".columnar"
+
+# Arrays por frame (F) y por frame x jugador (F x P) que componen el almacén
+CAMPOS_FRAME = {'periodo': np.int16, 'frame_idx': np.int64, 'game_clock': np.float64}
+CAMPOS_JUGADOR = {'x': np.float64, 'y': np.float64, 'speed': np.float64}
+# Índice de líneas: posición en bytes de cada frame dentro del JSONL
+CAMPO_OFFSET = 'offset'
+
+PROCESOS_DECODIFICACION = None              # procesos para decodificar el JSONL (None = todos los núcleos)
+TAMANO_MINIMO_PARALELO = 64 * 1024 ** 2     # por debajo de este tamaño (bytes) se decodifica en un solo proceso
+
+# Un cerrojo por JSONL: las sesiones de Streamlit (hilos) que abren a la vez un partido sin
+# almacén esperan a que lo construya la primera en lugar de decodificarlo cada una
+_CERROJOS = {}
+_CERROJO = threading.Lock()
+
+
+def ruta_almacen(ruta_jsonl):
+    """
+    Devuelve la carpeta donde se guarda el almacén columnar de un JSONL de tracking
+    (junto al propio fichero, p.ej. 'g1000_SecondSpectrum_Data.columnar').
+    """
+    return os.path.splitext(ruta_jsonl)[0] + EXTENSION_ALMACEN
+
+
+def huella_fichero(ruta):
+    """
+    Huella barata de un fichero (tamaño + fecha de modificación) para detectar cambios.
+    """
+    info = os.stat(ruta)
+    return {'tamano': info.st_size, 'mtime_ns': info.st_mtime_ns}
+
+
+def _leer_meta(carpeta):
+    try:
+        with open(os.path.join(carpeta, 'meta.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _cerrojo_almacen(ruta_jsonl):
+    with _CERROJO:
+        return _CERROJOS.setdefault(os.path.abspath(ruta_jsonl), threading.Lock())
+
+
+def almacen_actualizado(ruta_jsonl):
+    """
+    Indica si el almacén del JSONL existe y corresponde a la versión actual del fichero.
+    """
+    meta = _leer_meta(ruta_almacen(ruta_jsonl))
+    return (
+        meta is not None
+        and meta.get('version') == VERSION_ALMACEN
+        and meta.get('huella') == huella_fichero(ruta_jsonl)
+    )
+
+
+def _columnas_desde_frames(frames):
+    """
+    Recorre una única vez una secuencia de frames (diccionarios con el formato del JSONL)
+    y devuelve los arrays columnares del partido, la tabla de jugadores y su equipo.
+    """
+    jugadores = {}          # playerId -> código interno (orden de primera aparición)
+    equipos = []
+    periodos, frame_idx, game_clock = [], [], []
+    filas, codigos, xs, ys, speeds = [], [], [], [], []
+
+    for frame in frames:
+        fila = len(periodos)
+        periodos.append(frame.get('period') or 0)
+        frame_idx.append(frame.get('frameIdx', fila))
+        game_clock.append(frame.get('gameClock') or 0.0)
+
+        for equipo, clave in enumerate(('homePlayers', 'awayPlayers')):
+            for player in frame.get(clave, []):
+                codigo = jugadores.get(player['playerId'])
+                if codigo is None:
+                    codigo = jugadores[player['playerId']] = len(jugadores)
+                    equipos.append(equipo)
+                filas.append(fila)
+                codigos.append(codigo)
+                xs.append(player['xyz'][0])
+                ys.append(player['xyz'][1])
+                speeds.append(player.get('speed', 0.0))
+
+    n_frames, n_jugadores = len(periodos), len(jugadores)
+    arrays = {
+        'periodo': np.array(periodos, dtype=CAMPOS_FRAME['periodo']),
+        'frame_idx': np.array(frame_idx, dtype=CAMPOS_FRAME['frame_idx']),
+        'game_clock': np.array(game_clock, dtype=CAMPOS_FRAME['game_clock']),
+    }
+    for campo, valores in (('x', xs), ('y', ys), ('speed', speeds)):
+        matriz = np.full((n_frames, n_jugadores), np.nan, dtype=CAMPOS_JUGADOR[campo])
+        matriz[filas, codigos] = valores
+        arrays[campo] = matriz
+
+    return arrays, list(jugadores), equipos
+
+
+def _decodificar_jsonl(ruta_jsonl):
+    """
+    Decodifica el JSONL una única vez y devuelve los arrays columnares del partido,
+    incluido el índice de líneas (posición en bytes de cada frame).
+    """
+    offsets = []
+
+    def frames(f):
+        offset = 0
+        for linea in f:
+            if linea.strip():
+                offsets.append(offset)
+                yield json.loads(linea)
+            offset += len(linea)
+
+    with open(ruta_jsonl, 'rb') as f:
+        arrays, jugadores, equipos = _columnas_desde_frames(frames(f))
+    arrays[CAMPO_OFFSET] = np.array(offsets, dtype=np.int64)
+    return arrays, jugadores, equipos
+
+
+def ruta_metadata(ruta_jsonl):
+    return ruta_jsonl.replace("_SecondSpectrum_Data.jsonl", "_SecondSpectrum_Metadata.json")
+
+
+def _jugadores_metadata(ruta_jsonl):
+    """
+    Tabla de jugadores (ssiId) y su equipo según el metadata del partido, o None si no existe.
+    """
+    try:
+        with open(ruta_metadata(ruta_jsonl), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    jugadores, equipos = [], []
+    for equipo, clave in enumerate(('homePlayers', 'awayPlayers')):
+        for p in meta.get(clave, []):
+            if p.get('ssiId') is not None and p['ssiId'] not in jugadores:
+                jugadores.append(p['ssiId'])
+                equipos.append(equipo)
+    return jugadores, equipos
+
+
+def _rangos_lineas(ruta_jsonl, n_rangos):
+    """
+    Divide el fichero en `n_rangos` rangos de bytes [inicio, fin) que empiezan y acaban en
+    límites de línea.
+    """
+    tamano = os.path.getsize(ruta_jsonl)
+    limites = [0]
+    with open(ruta_jsonl, 'rb') as f:
+        for k in range(1, n_rangos):
+            posicion = max(tamano * k // n_rangos, limites[-1])
+            if posicion > 0:
+                # Avanza hasta el principio de la siguiente línea
+                f.seek(posicion - 1)
+                f.readline()
+                posicion = f.tell()
+            limites.append(min(posicion, tamano))
+    limites.append(tamano)
+    return [(inicio, fin) for inicio, fin in zip(limites, limites[1:]) if fin > inicio]
+
+
+def _lineas_rango(f, inicio, fin):
+    """(offset, línea) de las líneas no vacías que empiezan en [inicio, fin)."""
+    f.seek(inicio)
+    offset = inicio
+    while offset < fin:
+        linea = f.readline()
+        if not linea:
+            break
+        if linea.strip():
+            yield offset, linea
+        offset += len(linea)
+
+
+def _contar_lineas(ruta_jsonl, inicio, fin):
+    with open(ruta_jsonl, 'rb') as f:
+        return sum(1 for _ in _lineas_rango(f, inicio, fin))
+
+
+def _formas(n_frames, n_jugadores):
+    formas = {campo: ((n_frames,), dtype) for campo, dtype in CAMPOS_FRAME.items()}
+    formas[CAMPO_OFFSET] = ((n_frames,), np.int64)
+    formas.update({campo: ((n_frames, n_jugadores), dtype) for campo, dtype in CAMPOS_JUGADOR.items()})
+    return formas
+
+
+def _abrir_memoria(nombre):
+    """
+    Abre un bloque de memoria compartida creado por el proceso principal, que es quien lo
+    libera. Hasta Python 3.13 abrirlo lo registra también en el resource_tracker, que avisaría
+    de una fuga al terminar el proceso hijo, así que se anula ese registro.
+    """
+    try:
+        return shared_memory.SharedMemory(name=nombre, track=False)
+    except TypeError:
+        bloque = shared_memory.SharedMemory(name=nombre)
+        resource_tracker.unregister(bloque._name, "shared_memory")
+        return bloque
+
+
+def _decodificar_rango(ruta_jsonl, inicio, fin, fila, codigos, memorias, n_frames):
+    """
+    Decodifica un rango del JSONL escribiendo directamente en la memoria compartida.
+    Devuelve las apariciones de jugadores que no están en `codigos` (no previstos en el metadata).
+    """
+    bloques = {campo: _abrir_memoria(nombre) for campo, nombre in memorias.items()}
+    arrays = {
+        campo: np.ndarray(forma, dtype=dtype, buffer=bloques[campo].buf)
+        for campo, (forma, dtype) in _formas(n_frames, len(codigos)).items()
+    }
+    extras = []
+    try:
+        with open(ruta_jsonl, 'rb') as f:
+            for offset, linea in _lineas_rango(f, inicio, fin):
+                frame = json.loads(linea)
+                arrays['periodo'][fila] = frame.get('period') or 0
+                arrays['frame_idx'][fila] = frame.get('frameIdx', fila)
+                arrays['game_clock'][fila] = frame.get('gameClock') or 0.0
+                arrays[CAMPO_OFFSET][fila] = offset
+                for equipo, clave in enumerate(('homePlayers', 'awayPlayers')):
+                    for player in frame.get(clave, []):
+                        x, y = player['xyz'][0], player['xyz'][1]
+                        speed = player.get('speed', 0.0)
+                        codigo = codigos.get(player['playerId'])
+                        if codigo is None:
+                            extras.append((fila, player['playerId'], equipo, x, y, speed))
+                            continue
+                        arrays['x'][fila, codigo] = x
+                        arrays['y'][fila, codigo] = y
+                        arrays['speed'][fila, codigo] = speed
+                fila += 1
+    finally:
+        # Las vistas deben liberarse antes de cerrar la memoria compartida
+        del arrays
+        for bloque in bloques.values():
+            bloque.close()
+    return extras
+
+
+def _ordenar_por_aparicion(ruta_jsonl, arrays, jugadores, equipos):
+    """
+    Reordena las columnas de jugadores por orden de primera aparición (y, dentro del mismo
+    frame, por su posición en el frame) y descarta los que nunca aparecen, de modo que el
+    almacén sea idéntico al de la decodificación secuencial.
+    """
+    presente = ~np.isnan(arrays['x'])
+    aparece = presente.any(axis=0)
+    primera = presente.argmax(axis=0)
+
+    # Posición de cada jugador dentro de los frames en los que aparece por primera vez
+    posicion = {}
+    filas = sorted(set(primera[aparece].tolist()))
+    with open(ruta_jsonl, 'rb') as f:
+        for fila in filas:
+            f.seek(int(arrays[CAMPO_OFFSET][fila]))
+            frame = json.loads(f.readline())
+            orden = [p['playerId'] for clave in ('homePlayers', 'awayPlayers') for p in frame.get(clave, [])]
+            for k, pid in enumerate(orden):
+                posicion.setdefault((fila, pid), k)
+
+    codigos = np.flatnonzero(aparece).tolist()
+    codigos.sort(key=lambda c: (primera[c], posicion.get((primera[c], jugadores[c]), 0)))
+    for campo in CAMPOS_JUGADOR:
+        arrays[campo] = np.ascontiguousarray(arrays[campo][:, codigos])
+    return arrays, [jugadores[c] for c in codigos], [equipos[c] for c in codigos]
+
+
+def _decodificar_jsonl_paralelo(ruta_jsonl, jugadores, equipos, procesos):
+    """
+    Decodifica el JSONL repartiendo rangos de bytes entre varios procesos, que escriben los
+    campos necesarios directamente en memoria compartida (sin serializar los arrays).
+
+    La tabla de jugadores se toma del metadata; las apariciones de jugadores que no estén en
+    él se devuelven aparte y se añaden al final.
+    """
+    rangos = _rangos_lineas(ruta_jsonl, procesos)
+    codigos = {pid: codigo for codigo, pid in enumerate(jugadores)}
+    rutas = [ruta_jsonl] * len(rangos)
+    inicios = [inicio for inicio, _ in rangos]
+    fines = [fin for _, fin in rangos]
+
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        # 1) Número de frames de cada rango, para saber en qué fila empieza cada uno
+        conteos = list(pool.map(_contar_lineas, rutas, inicios, fines))
+        filas = np.concatenate([[0], np.cumsum(conteos)[:-1]]).astype(int).tolist()
+        n_frames = int(sum(conteos))
+
+        # 2) Decodificación en paralelo sobre la memoria compartida
+        bloques, vistas = {}, {}
+        try:
+            for campo, (forma, dtype) in _formas(n_frames, len(jugadores)).items():
+                tamano = max(int(np.prod(forma)) * np.dtype(dtype).itemsize, 1)
+                bloques[campo] = shared_memory.SharedMemory(create=True, size=tamano)
+                vistas[campo] = np.ndarray(forma, dtype=dtype, buffer=bloques[campo].buf)
+                vistas[campo][...] = np.nan if campo in CAMPOS_JUGADOR else 0
+            memorias = {campo: bloque.name for campo, bloque in bloques.items()}
+
+            extras = []
+            for parcial in pool.map(
+                _decodificar_rango, rutas, inicios, fines, filas,
+                [codigos] * len(rangos), [memorias] * len(rangos), [n_frames] * len(rangos)
+            ):
+                extras.extend(parcial)
+            arrays = {campo: vista.copy() for campo, vista in vistas.items()}
+        finally:
+            vistas.clear()
+            for bloque in bloques.values():
+                bloque.close()
+                bloque.unlink()
+
+    # Jugadores que no estaban en el metadata
+    jugadores, equipos = list(jugadores), list(equipos)
+    if extras:
+        nuevos = {}
+        for fila, pid, equipo, _, _, _ in extras:
+            if pid not in nuevos:
+                nuevos[pid] = len(jugadores)
+                jugadores.append(pid)
+                equipos.append(equipo)
+        for campo in CAMPOS_JUGADOR:
+            columnas = np.full((n_frames, len(nuevos)), np.nan, dtype=CAMPOS_JUGADOR[campo])
+            arrays[campo] = np.hstack([arrays[campo], columnas])
+        filas_extra = [e[0] for e in extras]
+        codigos_extra = [nuevos[e[1]] for e in extras]
+        for campo, k in (('x', 3), ('y', 4), ('speed', 5)):
+            arrays[campo][filas_extra, codigos_extra] = [e[k] for e in extras]
+
+    return _ordenar_por_aparicion(ruta_jsonl, arrays, jugadores, equipos)
+
+
+def _decodificar(ruta_jsonl, procesos=None):
+    """
+    Decodifica el JSONL en paralelo si el fichero es grande, hay varios núcleos y existe el
+    metadata del partido; si no, en un solo proceso.
+    """
+    procesos = procesos or PROCESOS_DECODIFICACION or os.cpu_count() or 1
+    if procesos > 1 and os.path.getsize(ruta_jsonl) >= TAMANO_MINIMO_PARALELO:
+        tabla = _jugadores_metadata(ruta_jsonl)
+        if tabla is not None:
+            return _decodificar_jsonl_paralelo(ruta_jsonl, tabla[0], tabla[1], procesos)
+    return _decodificar_jsonl(ruta_jsonl)
+
+
+def construir_almacen(ruta_jsonl, procesos=None):
+    """
+    Convierte el JSONL de tracking de un partido en un almacén columnar en disco:
+    arrays .npy (frames x jugadores para x, y, speed, guardados por columnas; periodo, frameIdx, gameClock y posición
+    de la línea en el JSONL por frame) más una tabla de jugadores. Los jugadores ausentes en
+    un frame quedan como NaN.
+
+    Args:
+        ruta_jsonl: Ruta del JSONL de tracking.
+        procesos: Procesos para decodificar (None = PROCESOS_DECODIFICACION o todos los núcleos).
+
+    Returns:
+        Ruta de la carpeta del almacén.
+    """
+    carpeta = ruta_almacen(ruta_jsonl)
+    os.makedirs(carpeta, exist_ok=True)
+    huella = huella_fichero(ruta_jsonl)
+
+    arrays, jugadores, equipos = _decodificar(ruta_jsonl, procesos)
+
+    # Se escribe en temporales y se renombra; meta.json va al final y marca el almacén como válido
+    sufijo = f".tmp{os.getpid()}.{threading.get_ident()}"
+    for campo, array in arrays.items():
+        destino = os.path.join(carpeta, f"{campo}.npy")
+        if campo in CAMPOS_JUGADOR:
+            # Por columnas: la serie de cada jugador queda contigua en disco (ver filtrar_jugadores)
+            array = np.asfortranarray(array)
+        with open(destino + sufijo, 'wb') as f:
+            np.save(f, array)
+        os.replace(destino + sufijo, destino)
+
+    meta = {
+        'version': VERSION_ALMACEN,
+        'huella': huella,
+        'n_frames': len(arrays['periodo']),
+        'jugadores': jugadores,
+        'equipos': equipos,
+    }
+    destino = os.path.join(carpeta, 'meta.json')
+    with open(destino + sufijo, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(destino + sufijo, destino)
+
+    return carpeta
+
+
+def preparar_almacenes(rutas_jsonl, procesos=None):
+    """
+    Construye, uno tras otro, los almacenes que falten o estén desactualizados. Se llama en
+    el proceso principal antes de repartir partidos entre procesos: así cada JSONL se
+    decodifica con un solo pool y los procesos de cada partido solo abren el almacén.
+
+    Args:
+        rutas_jsonl: JSONL de los partidos.
+        procesos: Procesos para decodificar cada JSONL (None = PROCESOS_DECODIFICACION o
+                  todos los núcleos).
+    """
+    for ruta_jsonl in rutas_jsonl:
+        try:
+            _asegurar_almacen(ruta_jsonl, procesos)
+        except (OSError, ValueError, KeyError):
+            # El error se notifica al procesar el partido
+            continue
+
+
+def _asegurar_almacen(ruta_jsonl, procesos=None):
+    # Se vuelve a comprobar dentro del cerrojo: otro hilo puede haberlo construido mientras tanto
+    if almacen_actualizado(ruta_jsonl):
+        return
+    with _cerrojo_almacen(ruta_jsonl):
+        if not almacen_actualizado(ruta_jsonl):
+            construir_almacen(ruta_jsonl, procesos)
+
+
+def abrir_almacen(ruta_jsonl, procesos=None):
+    """
+    Abre el almacén columnar de un partido con numpy.memmap, reconstruyéndolo
+    automáticamente si no existe o si el JSONL de origen ha cambiado.
+
+    Args:
+        ruta_jsonl: Ruta del JSONL de tracking.
+        procesos: Procesos para decodificar si hay que construirlo (None = PROCESOS_DECODIFICACION
+                  o todos los núcleos). Dentro de un pool de partidos debe ser 1.
+
+    Returns:
+        Diccionario con los arrays del partido a resolución completa:
+          'periodo', 'frame_idx', 'game_clock', 'offset' (F,), 'x', 'y', 'speed' (F x P),
+          'jugadores' (lista de playerId), 'equipo' (P,: 0 local, 1 visitante),
+          'ruta' y 'huella' del JSONL de origen.
+    """
+    _asegurar_almacen(ruta_jsonl, procesos)
+
+    carpeta = ruta_almacen(ruta_jsonl)
+    meta = _leer_meta(carpeta)
+
+    partido = {
+        campo: np.load(os.path.join(carpeta, f"{campo}.npy"), mmap_mode='r')
+        for campo in list(CAMPOS_FRAME) + list(CAMPOS_JUGADOR) + [CAMPO_OFFSET]
+    }
+    partido['jugadores'] = meta['jugadores']
+    partido['equipo'] = np.array(meta['equipos'], dtype=np.int8)
+    partido['ruta'] = ruta_jsonl
+    partido['huella'] = meta['huella']
+    partido['frame_step'] = 1
+    return partido
+
+
+def submuestrear(partido, frame_step):
+    """
+    Vista submuestreada del partido: se queda con un frame de cada `frame_step`
+    (los mismos que la lectura original del JSONL, es decir, las líneas (i + 1) % frame_step == 0).
+    Sobre un memmap el corte no copia datos.
+    """
+    if frame_step <= 1:
+        return partido
+    resultado = dict(partido)
+    for campo in _campos_por_frame(partido):
+        resultado[campo] = partido[campo][frame_step - 1::frame_step]
+    resultado['frame_step'] = partido.get('frame_step', 1) * frame_step
+    return resultado
+
+
+def _campos_por_frame(partido):
+    campos = list(CAMPOS_FRAME) + list(CAMPOS_JUGADOR)
+    return campos + [CAMPO_OFFSET] if CAMPO_OFFSET in partido else campos
+
+
+def seleccionar_lineas(partido, periodo=None, desde=None, hasta=None, frame_step=1):
+    """
+    Frames (líneas del JSONL) de un periodo y/o ventana de reloj de juego, sin leer el JSONL.
+
+    Args:
+        partido: Partido columnar a resolución completa (ver abrir_almacen).
+        periodo: Periodo a seleccionar (None = todos).
+        desde, hasta: Ventana [desde, hasta) en segundos de 'gameClock' (None = sin límite).
+        frame_step: Se queda con las líneas (i + 1) % frame_step == 0, como el submuestreo
+                    (p.ej. 5 para 5 Hz o 25 para una vista previa a 1 Hz).
+
+    Returns:
+        Array ordenado con los números de línea seleccionados.
+    """
+    n_frames = len(partido['periodo'])
+    seleccion = np.ones(n_frames, dtype=bool)
+    if frame_step > 1:
+        seleccion[:] = False
+        seleccion[frame_step - 1::frame_step] = True
+    if periodo is not None:
+        seleccion &= np.asarray(partido['periodo']) == periodo
+    if desde is not None:
+        seleccion &= np.asarray(partido['game_clock']) >= desde
+    if hasta is not None:
+        seleccion &= np.asarray(partido['game_clock']) < hasta
+    return np.flatnonzero(seleccion)
+
+
+def recortar(partido, lineas):
+    """
+    Partido columnar con solo los frames indicados. Sobre un memmap solo se leen esas filas.
+    El resultado no conserva la huella (no es el partido completo) y guarda en 'linea' el
+    número de línea original de cada frame.
+    """
+    lineas = np.asarray(lineas, dtype=np.int64)
+    resultado = dict(partido)
+    for campo in _campos_por_frame(partido):
+        resultado[campo] = np.asarray(partido[campo][lineas])
+    resultado['linea'] = lineas
+    resultado.pop('huella', None)
+    return resultado
+
+
+def filtrar_jugadores(partido, player_ids):
+    """
+    Partido columnar con solo los jugadores indicados (los campos por frame se conservan).
+    Como x, y y speed se guardan por columnas, sobre un memmap solo se leen las columnas
+    de esos jugadores. El resultado no conserva la huella (no es el partido completo).
+
+    Args:
+        partido: Partido columnar (ver abrir_almacen), completo, submuestreado o recortado.
+        player_ids: IDs de los jugadores a conservar; los que no aparecen en el partido se ignoran.
+    """
+    seleccion = set(player_ids)
+    codigos = [codigo for codigo, pid in enumerate(partido['jugadores']) if pid in seleccion]
+    resultado = dict(partido)
+    for campo in CAMPOS_JUGADOR:
+        resultado[campo] = np.asarray(partido[campo][:, codigos])
+    resultado['jugadores'] = [partido['jugadores'][codigo] for codigo in codigos]
+    resultado['equipo'] = np.asarray(partido['equipo'])[codigos]
+    if 'codigos' in partido:
+        resultado['codigos'] = np.asarray(partido['codigos'])[codigos]
+    resultado.pop('huella', None)
+    return resultado
+
+
+def leer_frames(ruta_jsonl, lineas):
+    """
+    Lee y decodifica del JSONL solo las líneas indicadas, saltando directamente a cada una
+    con el índice de líneas del almacén (se construye si no existe).
+
+    Returns:
+        Lista de frames (diccionarios con el formato del JSONL) en el orden de `lineas`.
+    """
+    offsets = abrir_almacen(ruta_jsonl)[CAMPO_OFFSET]
+    frames = []
+    with open(ruta_jsonl, 'rb') as f:
+        for linea in np.asarray(lineas, dtype=np.int64).tolist():
+            f.seek(int(offsets[linea]))
+            frames.append(json.loads(f.readline()))
+    return frames
+
+
+def es_columnar(data):
+    return isinstance(data, dict) and 'x' in data and 'jugadores' in data
+
+
+def como_frames(data):
+    """
+    Devuelve los datos como lista de frames (diccionarios con 'period', 'homePlayers' y
+    'awayPlayers'), reconstruyéndolos si se recibe un partido columnar.
+    """
+    if not es_columnar(data):
+        return data
+
+    jugadores = data['jugadores']
+    equipo = np.asarray(data['equipo'])
+    x = np.asarray(data['x'], dtype=np.float64)
+    y = np.asarray(data['y'], dtype=np.float64)
+    speed = np.asarray(data['speed'], dtype=np.float64)
+    presente = ~np.isnan(x)
+
+    frames = []
+    for fila, periodo in enumerate(np.asarray(data['periodo']).tolist()):
+        frame = {'period': periodo, 'homePlayers': [], 'awayPlayers': []}
+        for codigo in np.flatnonzero(presente[fila]).tolist():
+            clave = 'homePlayers' if equipo[codigo] == 0 else 'awayPlayers'
+            frame[clave].append({
+                'playerId': jugadores[codigo],
+                'xyz': [float(x[fila, codigo]), float(y[fila, codigo]), 0.0],
+                'speed': float(speed[fila, codigo]),
+            })
+        frames.append(frame)
+    return frames
+
+
+def como_columnar(data):
+    """
+    Devuelve los datos como partido columnar, convirtiendo en memoria si se recibe
+    una lista de frames.
+    """
+    if es_columnar(data):
+        return data
+
+    arrays, jugadores, equipos = _columnas_desde_frames(data)
+    partido = dict(arrays)
+    partido['jugadores'] = jugadores
+    partido['equipo'] = np.array(equipos, dtype=np.int8)
+    partido['frame_step'] = 1
+    return partido
@@ -0,0 +1,101 @@
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+LIMITE_MEMORIA_BYTES = 1024 ** 3    # presupuesto de memoria de los partidos cargados (LRU por tamaño)
+
+# Caché única por proceso: la comparten todas las sesiones de Streamlit, que se ejecutan
+# como hilos del mismo proceso
+_CACHE = {
+    'entradas': OrderedDict(),      # clave -> (partido, tamaño estimado en bytes), de menos a más reciente
+    'bytes': 0,
+    'limite': LIMITE_MEMORIA_BYTES,
+    'aciertos': 0,
+    'fallos': 0,
+    'desalojos': 0,
+}
+_CERROJO = threading.RLock()
+
+
+def estimar_tamano(valor):
+    """
+    Tamaño aproximado en bytes de un partido: los arrays cuentan por sus datos (también los
+    memmap, que pueden acabar enteros en memoria) y diccionarios y listas por su contenido.
+    """
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(estimar_tamano(k) + estimar_tamano(v) for k, v in valor.items())
+    if isinstance(valor, (list, tuple)):
+        return sys.getsizeof(valor) + sum(estimar_tamano(v) for v in valor)
+    return sys.getsizeof(valor)
+
+
+def _desalojar(limite_bytes):
+    entradas = _CACHE['entradas']
+    while entradas and _CACHE['bytes'] > limite_bytes:
+        _, (_, tamano) = entradas.popitem(last=False)
+        _CACHE['bytes'] -= tamano
+        _CACHE['desalojos'] += 1
+
+
+def obtener(clave, cargar):
+    """
+    Devuelve el partido guardado con esa clave o lo carga con `cargar()` y lo guarda,
+    desalojando los menos usados si se supera el presupuesto. Un partido mayor que el
+    presupuesto completo se devuelve sin guardarlo.
+    """
+    with _CERROJO:
+        entrada = _CACHE['entradas'].get(clave)
+        if entrada is not None:
+            _CACHE['entradas'].move_to_end(clave)
+            _CACHE['aciertos'] += 1
+            return entrada[0]
+        _CACHE['fallos'] += 1
+
+    # La carga se hace fuera del cerrojo para no bloquear a las demás sesiones
+    partido = cargar()
+    tamano = estimar_tamano(partido)
+
+    with _CERROJO:
+        if tamano > _CACHE['limite'] or clave in _CACHE['entradas']:
+            return partido
+        _CACHE['entradas'][clave] = (partido, tamano)
+        _CACHE['bytes'] += tamano
+        _desalojar(_CACHE['limite'])
+    return partido
+
+
+def invalidar(filtro=None):
+    """
+    Elimina de la caché las entradas cuya clave cumple `filtro(clave)` (None = todas).
+
+    Returns:
+        Número de entradas eliminadas.
+    """
+    with _CERROJO:
+        claves = [clave for clave in _CACHE['entradas'] if filtro is None or filtro(clave)]
+        for clave in claves:
+            _, tamano = _CACHE['entradas'].pop(clave)
+            _CACHE['bytes'] -= tamano
+        return len(claves)
+
+
+def configurar_limite(limite_bytes):
+    """Cambia el presupuesto de memoria, desalojando lo necesario."""
+    with _CERROJO:
+        _CACHE['limite'] = limite_bytes
+        _desalojar(limite_bytes)
+
+
+def estadisticas():
+    """
+    Returns:
+        Diccionario con 'entradas', 'bytes', 'limite', 'aciertos', 'fallos' y 'desalojos'.
+    """
+    with _CERROJO:
+        resultado = {campo: valor for campo, valor in _CACHE.items() if campo != 'entradas'}
+        resultado['entradas'] = len(_CACHE['entradas'])
+        return resultado
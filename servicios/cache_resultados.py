@@ -0,0 +1,128 @@
+import os
+import json
+import hashlib
+import inspect
+import pickle
+import threading
+
+from servicios.almacen_tracking import huella_fichero
+
+VERSION_RESULTADOS = 1                  # subir si cambia la forma de calcular alguna métrica
+CARPETA_CACHE = os.path.join("cache", "resultados")
+LIMITE_CACHE_BYTES = 512 * 1024 ** 2    # tamaño máximo de la caché en disco (LRU)
+EXTENSION_RESULTADO = ".pkl"
+
+
+def parametros_metrica(funcion, constantes=None):
+    """
+    Parámetros de los que depende el resultado de una métrica: valores por defecto de los
+    argumentos de la función (umbrales, ventanas de suavizado...) más las constantes de
+    módulo indicadas.
+
+    Args:
+        funcion: Función que calcula la métrica.
+        constantes: Diccionario nombre -> valor con las constantes de módulo que usa.
+
+    Returns:
+        Diccionario serializable con todos los parámetros.
+    """
+    parametros = {
+        nombre: parametro.default
+        for nombre, parametro in inspect.signature(funcion).parameters.items()
+        if parametro.default is not inspect.Parameter.empty
+    }
+    parametros.update(constantes or {})
+    parametros['funcion'] = f"{funcion.__module__}.{funcion.__name__}"
+    return parametros
+
+
+def clave_resultado(ruta_jsonl, huella, frame_step, frame_duration, familia, parametros):
+    """
+    Clave de un resultado: huella del JSONL de origen, submuestreo, duración del frame,
+    familia de métricas y sus parámetros.
+    """
+    contenido = {
+        'version': VERSION_RESULTADOS,
+        'ruta': os.path.abspath(ruta_jsonl),
+        'huella': huella,
+        'frame_step': frame_step,
+        'frame_duration': frame_duration,
+        'familia': familia,
+        'parametros': parametros,
+    }
+    texto = json.dumps(contenido, sort_keys=True, default=str)
+    return hashlib.sha1(texto.encode('utf-8')).hexdigest()
+
+
+def _ruta_resultado(clave):
+    return os.path.join(CARPETA_CACHE, clave + EXTENSION_RESULTADO)
+
+
+def leer_resultado(clave):
+    """
+    Devuelve el DataFrame guardado con esa clave, o None si no está en la caché.
+    Cada acierto actualiza la fecha del fichero para el desalojo LRU.
+    """
+    ruta = _ruta_resultado(clave)
+    try:
+        with open(ruta, 'rb') as f:
+            resultado = pickle.load(f)
+        os.utime(ruta)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    return resultado
+
+
+def guardar_resultado(clave, resultado):
+    """
+    Guarda un DataFrame en la caché y desaloja los resultados menos usados si se supera
+    LIMITE_CACHE_BYTES.
+    """
+    os.makedirs(CARPETA_CACHE, exist_ok=True)
+    ruta = _ruta_resultado(clave)
+    temporal = ruta + f".tmp{os.getpid()}.{threading.get_ident()}"
+    with open(temporal, 'wb') as f:
+        pickle.dump(resultado, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporal, ruta)
+    desalojar(LIMITE_CACHE_BYTES)
+
+
+def desalojar(limite_bytes):
+    """
+    Borra los resultados usados hace más tiempo hasta que la caché ocupe como mucho `limite_bytes`.
+    """
+    entradas = []
+    for nombre in os.listdir(CARPETA_CACHE):
+        if not nombre.endswith(EXTENSION_RESULTADO):
+            continue
+        ruta = os.path.join(CARPETA_CACHE, nombre)
+        try:
+            info = os.stat(ruta)
+        except OSError:
+            continue
+        entradas.append((info.st_mtime_ns, info.st_size, ruta))
+
+    total = sum(tamano for _, tamano, _ in entradas)
+    for _, tamano, ruta in sorted(entradas):
+        if total <= limite_bytes:
+            break
+        try:
+            os.remove(ruta)
+        except OSError:
+            continue
+        total -= tamano
+
+
+def huella_partido(data):
+    """
+    Huella del JSONL de origen de un partido columnar, o None si los datos no proceden
+    directamente de un fichero (p.ej. lista de frames o datos ya modificados).
+    """
+    if not isinstance(data, dict) or not data.get('ruta') or 'huella' not in data:
+        return None
+    try:
+        if huella_fichero(data['ruta']) != data['huella']:
+            return None
+    except OSError:
+        return None
+    return data['huella']
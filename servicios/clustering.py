@@ -1,30 +1,136 @@
+import os
+import threading
+
+import joblib
 import pandas as pd
+from joblib import Parallel, delayed
 from sklearn.preprocessing import StandardScaler
 from sklearn.cluster import KMeans
 from sklearn.decomposition import PCA
+from sklearn.metrics import silhouette_score, davies_bouldin_score
 
-def clustering_perfiles(k: int = 3):
+from servicios.grafo_similitud import huella_csv
+
+VERSION_CLUSTERING = 1
+RUTA_METRICAS = "config/metricas_con_nombres.csv"
+CARPETA_CLUSTERING = os.path.join("cache", "clustering")
+K_BARRIDO = range(2, 13)    # valores de k que evalúa barrido_k
+SEMILLA = 42
 
-    csv_path = "config/metricas_con_nombres.csv"
-    df = pd.read_csv(csv_path)  
-    
-    columnas_metricas = df.columns[1:]  # asume que la primera columna es 'Jugador'
-    df_metricas = df[columnas_metricas]
+# Modelos ajustados por huella del CSV; se comparten entre las sesiones de Streamlit (hilos)
+_MODELOS = {}
+_CERROJO = threading.RLock()
 
 
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(df_metricas)
+def _ruta_modelos(huella, carpeta):
+    return os.path.join(carpeta, f"{huella}.joblib")
 
-    kmeans = KMeans(n_clusters=k, random_state=42)
-    clusters = kmeans.fit_predict(X_scaled)
 
+def _nuevos_modelos(df):
+    """Escalado y PCA (no dependen de k) y diccionario vacío de ajustes por k."""
+    columnas_metricas = list(df.columns[1:])   # asume que la primera columna es 'Jugador'
+    escalador = StandardScaler()
+    X_scaled = escalador.fit_transform(df[columnas_metricas])
     pca = PCA(n_components=2)
-    X_pca = pca.fit_transform(X_scaled)
+    return {
+        'version': VERSION_CLUSTERING,
+        'parametros': {'semilla': SEMILLA},
+        'metricas': df[columnas_metricas],
+        'escalador': escalador,
+        'X_scaled': X_scaled,
+        'pca': pca,
+        'X_pca': pca.fit_transform(X_scaled),
+        'ajustes': {},      # k -> resultado de _ajustar_kmeans
+    }
+
+
+def _cargar_modelos(ruta=RUTA_METRICAS, carpeta=CARPETA_CLUSTERING):
+    """
+    Modelos de la versión actual del CSV: en memoria, si no del disco y si no se crean
+    (escalado y PCA, sin ningún k ajustado todavía).
+    """
+    huella = huella_csv(ruta)
+    with _CERROJO:
+        modelos = _MODELOS.get(huella)
+        if modelos is None:
+            try:
+                modelos = joblib.load(_ruta_modelos(huella, carpeta))
+            except (OSError, EOFError, ValueError):
+                modelos = None
+            if (modelos is None or modelos.get('version') != VERSION_CLUSTERING
+                    or modelos.get('parametros') != {'semilla': SEMILLA}):
+                modelos = _nuevos_modelos(pd.read_csv(ruta))
+            _MODELOS.clear()
+            _MODELOS[huella] = modelos
+        return huella, modelos
+
+
+def _guardar_modelos(huella, modelos, carpeta=CARPETA_CLUSTERING):
+    os.makedirs(carpeta, exist_ok=True)
+    destino = _ruta_modelos(huella, carpeta)
+    temporal = destino + f".tmp{os.getpid()}.{threading.get_ident()}"
+    joblib.dump(modelos, temporal)
+    os.replace(temporal, destino)
+
+
+def _ajustar_kmeans(X_scaled, k, semilla=SEMILLA):
+    """K-Means con k grupos y sus medidas de calidad."""
+    kmeans = KMeans(n_clusters=k, random_state=semilla)
+    etiquetas = kmeans.fit_predict(X_scaled)
+    return {
+        'modelo': kmeans,
+        'etiquetas': etiquetas,
+        'inercia': float(kmeans.inertia_),
+        'silueta': float(silhouette_score(X_scaled, etiquetas)),
+        'davies_bouldin': float(davies_bouldin_score(X_scaled, etiquetas)),
+    }
+
+
+def _ajustes(ks, procesos=None, ruta=RUTA_METRICAS, carpeta=CARPETA_CLUSTERING):
+    """
+    Ajustes de los k pedidos: los que faltan se calculan con joblib repartidos entre
+    procesos (None = todos los núcleos, 1 = sin pool) y se guardan en disco.
+    """
+    huella, modelos = _cargar_modelos(ruta, carpeta)
+    faltan = [k for k in ks if k not in modelos['ajustes']]
+    if faltan:
+        n_jobs = 1 if len(faltan) == 1 else (procesos or -1)
+        nuevos = Parallel(n_jobs=n_jobs)(delayed(_ajustar_kmeans)(modelos['X_scaled'], k) for k in faltan)
+        with _CERROJO:
+            modelos['ajustes'].update(zip(faltan, nuevos))
+            _guardar_modelos(huella, modelos, carpeta)
+    return modelos
+
+
+def barrido_k(ks=K_BARRIDO, procesos=None, ruta=RUTA_METRICAS, carpeta=CARPETA_CLUSTERING):
+    """
+    Evalúa K-Means para cada k (por defecto de 2 a 12) sobre las métricas de la temporada
+    estandarizadas. Solo se ajustan los k que no estén ya guardados para esa versión del CSV.
+
+    Returns:
+        DataFrame con 'k', 'inercia', 'silueta' y 'davies_bouldin'.
+    """
+    modelos = _ajustes(list(ks), procesos, ruta, carpeta)
+    return pd.DataFrame([
+        {'k': k, **{medida: modelos['ajustes'][k][medida] for medida in ('inercia', 'silueta', 'davies_bouldin')}}
+        for k in ks
+    ])
+
+
+def clustering_perfiles(k: int = 3):
+    """
+    Perfiles físicos con K-Means (k grupos) y proyección PCA en 2D. El escalado, la PCA y
+    cada ajuste se reutilizan mientras no cambie el CSV de la temporada.
+
+    Returns:
+        (DataFrame de métricas con 'perfil_fisico', 'PCA1' y 'PCA2', medias por perfil)
+    """
+    modelos = _ajustes([k])
 
-    df_resultado = df_metricas.copy()
-    df_resultado['perfil_fisico'] = clusters
-    df_resultado['PCA1'] = X_pca[:, 0]
-    df_resultado['PCA2'] = X_pca[:, 1]
+    df_resultado = modelos['metricas'].copy()
+    df_resultado['perfil_fisico'] = modelos['ajustes'][k]['etiquetas']
+    df_resultado['PCA1'] = modelos['X_pca'][:, 0]
+    df_resultado['PCA2'] = modelos['X_pca'][:, 1]
 
     resumen = df_resultado.groupby('perfil_fisico').mean(numeric_only=True)
 
@@ -0,0 +1,135 @@
+import os
+import json
+import threading
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import networkx as nx
+
+from servicios.grafo_similitud import grafo_knn, cargar_tabla, huella_csv, RUTA_METRICAS
+
+VERSION_COMUNIDADES = 1
+RUTA_COMUNIDADES = "config/comunidades_similitud.json"
+VECINOS_RED = 10        # vecinos más cercanos de cada jugador que se unen en la red
+RESOLUCION = 1.0        # resolución de Louvain (> 1 da familias más pequeñas)
+
+
+def red_similitud(metricas=None, N=VECINOS_RED, pesos=None, distancia='euclidea', ruta=RUTA_METRICAS):
+    """
+    Red de similitud de toda la temporada: cada jugador unido a sus N más parecidos (ver
+    grafo_knn). Cada arista guarda 'distancia' y 'similitud' = exp(-distancia / mediana de las
+    distancias de la red), que es el peso para detectar comunidades.
+
+    Args:
+        metricas: Columnas del CSV (None = todas las métricas).
+        N, pesos, distancia: Como en grafo_knn.
+    """
+    tabla = cargar_tabla(ruta)
+    if metricas is None:
+        metricas = [columna for columna in tabla['df'].columns if columna != "Jugador"]
+    grafo = grafo_knn(metricas, N, pesos, distancia, ruta)
+
+    origen = np.repeat(np.arange(len(grafo['jugadores'])), grafo['vecinos'].shape[1])
+    destino = grafo['vecinos'].ravel()
+    distancias = grafo['distancias'].ravel()
+    escala = np.median(distancias) if len(distancias) and np.median(distancias) > 0 else 1.0
+
+    G = nx.Graph()
+    G.add_nodes_from(grafo['jugadores'])
+    jugadores = grafo['jugadores']
+    # Las relaciones mutuas aparecen dos veces con la misma distancia: queda una sola arista
+    G.add_edges_from(
+        (jugadores[i], jugadores[j], {'distancia': float(d), 'similitud': float(np.exp(-d / escala))})
+        for i, j, d in zip(origen, destino, distancias)
+    )
+    G.graph.update(metricas=sorted(metricas), N=N, distancia=distancia)
+    return G
+
+
+def analizar_red(G, resolucion=RESOLUCION, semilla=42):
+    """
+    Familias físicas (comunidades de Louvain ponderadas por similitud) y centralidades de
+    cada jugador en la red.
+
+    Returns:
+        DataFrame con 'Jugador', 'comunidad' (0 = la más numerosa), 'grado' (suma de
+        similitudes), 'pagerank', 'intermediacion' y 'cercania' (sobre las distancias) y
+        'representativo' (jugador de mayor grado de su comunidad).
+    """
+    comunidades = nx.community.louvain_communities(G, weight='similitud', resolution=resolucion, seed=semilla)
+    comunidades = sorted(comunidades, key=lambda c: (-len(c), min(c)))
+    comunidad = {jugador: k for k, miembros in enumerate(comunidades) for jugador in miembros}
+
+    grado = dict(G.degree(weight='similitud'))
+    pagerank = nx.pagerank(G, weight='similitud')
+    intermediacion = nx.betweenness_centrality(G, weight='distancia')
+    cercania = nx.closeness_centrality(G, distance='distancia')
+
+    df = pd.DataFrame({
+        "Jugador": list(G.nodes),
+        "comunidad": [comunidad[j] for j in G.nodes],
+        "grado": [grado[j] for j in G.nodes],
+        "pagerank": [pagerank[j] for j in G.nodes],
+        "intermediacion": [intermediacion[j] for j in G.nodes],
+        "cercania": [cercania[j] for j in G.nodes],
+    })
+    df["representativo"] = df["grado"] == df.groupby("comunidad")["grado"].transform("max")
+    return df.sort_values(["comunidad", "grado"], ascending=[True, False], ignore_index=True)
+
+
+def guardar_comunidades(G, df_comunidades, ruta=RUTA_COMUNIDADES, ruta_metricas=RUTA_METRICAS):
+    """Guarda las comunidades, centralidades y aristas de la red junto con la huella del CSV."""
+    resultado = {
+        'version': VERSION_COMUNIDADES,
+        'huella': huella_csv(ruta_metricas),
+        'parametros': dict(G.graph),
+        'jugadores': df_comunidades.to_dict(orient="list"),
+        'aristas': [[a, b, d['distancia']] for a, b, d in G.edges(data=True)],
+    }
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = ruta + f".tmp{os.getpid()}.{threading.get_ident()}"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False)
+    os.replace(temporal, ruta)
+
+
+@lru_cache(maxsize=1)
+def _leer_comunidades(ruta, tamano, mtime_ns, huella):
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            resultado = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if resultado.get('version') != VERSION_COMUNIDADES or resultado.get('huella') != huella:
+        return None
+    return {
+        'parametros': resultado['parametros'],
+        'jugadores': pd.DataFrame(resultado['jugadores']),
+        'aristas': pd.DataFrame(resultado['aristas'], columns=["origen", "destino", "distancia"]),
+    }
+
+
+def cargar_comunidades(ruta=RUTA_COMUNIDADES, ruta_metricas=RUTA_METRICAS):
+    """
+    Comunidades guardadas por guardar_comunidades, leídas una vez por versión del fichero.
+
+    Returns:
+        Diccionario con 'parametros', 'jugadores' (DataFrame de analizar_red) y 'aristas'
+        (DataFrame 'origen', 'destino', 'distancia'), o None si no existen o se calcularon
+        con otra versión del CSV de métricas.
+    """
+    try:
+        estado = os.stat(ruta)
+    except OSError:
+        return None
+    return _leer_comunidades(ruta, estado.st_size, estado.st_mtime_ns, huella_csv(ruta_metricas))
+
+
+def comunidad_jugador(comunidades, jugador):
+    """Jugadores de la misma familia que `jugador` (None si no aparece)."""
+    df = comunidades['jugadores']
+    fila = df[df["Jugador"] == jugador]
+    if fila.empty:
+        return None
+    return df[df["comunidad"] == fila["comunidad"].iloc[0]].reset_index(drop=True)
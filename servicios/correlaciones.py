@@ -0,0 +1,228 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from servicios.procesa_partidos import cargar_partido, calcular_metricas
+from servicios.almacen_tracking import preparar_almacenes
+
+PROPORCION_NO_NULOS = 0.8   # proporción mínima de valores no nulos para conservar una columna
+
+
+def tabla_partido(resultados):
+    """
+    Une las tablas de métricas de un partido por playerId, con cada columna sufijada con el
+    nombre de su familia (p.ej. 'HMLD_potencia').
+    """
+    df_partido = pd.DataFrame()
+    for nombre_metrica, df_metrica in resultados.items():
+        df_metrica = df_metrica.copy()
+        df_metrica.set_index("playerId", inplace=True)
+        df_metrica.columns = [f"{col}_{nombre_metrica}" for col in df_metrica.columns]
+        if df_partido.empty:
+            df_partido = df_metrica
+        else:
+            df_partido = df_partido.join(df_metrica, how="outer")
+    return df_partido
+
+
+def nuevo_acumulador(columnas=()):
+    """
+    Acumulador de correlaciones por pares con datos incompletos. Para cada par de columnas
+    (i, j) guarda, sobre las filas en las que ambas tienen valor:
+      'n'        número de filas,
+      'media'    media de la columna i,
+      'm2'       suma de cuadrados centrados de la columna i,
+      'comoment' suma de productos centrados de i y j.
+    Además 'filas' cuenta todas las filas vistas y 'columnas' mantiene el orden de aparición.
+    """
+    c = len(columnas)
+    return {
+        'columnas': list(columnas),
+        'filas': 0,
+        'n': np.zeros((c, c)),
+        'media': np.zeros((c, c)),
+        'm2': np.zeros((c, c)),
+        'comoment': np.zeros((c, c)),
+    }
+
+
+def _alinear(acumulador, columnas):
+    """Expande el acumulador a `columnas` (las nuevas sin observaciones)."""
+    if acumulador['columnas'] == columnas:
+        return acumulador
+    posicion = [columnas.index(col) for col in acumulador['columnas']]
+    alineado = nuevo_acumulador(columnas)
+    alineado['filas'] = acumulador['filas']
+    for clave in ('n', 'media', 'm2', 'comoment'):
+        alineado[clave][np.ix_(posicion, posicion)] = acumulador[clave]
+    return alineado
+
+
+def fusionar(a, b):
+    """
+    Combina dos acumuladores (fórmulas de Chan et al. para medias y co-momentos),
+    p.ej. los resultados parciales de distintos procesos.
+    """
+    columnas = a['columnas'] + [col for col in b['columnas'] if col not in a['columnas']]
+    a, b = _alinear(a, columnas), _alinear(b, columnas)
+
+    n = a['n'] + b['n']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        peso_b = np.where(n > 0, b['n'] / n, 0.0)
+        cruzado = np.where(n > 0, a['n'] * b['n'] / n, 0.0)
+    delta = b['media'] - a['media']
+
+    resultado = nuevo_acumulador(columnas)
+    resultado['filas'] = a['filas'] + b['filas']
+    resultado['n'] = n
+    resultado['media'] = a['media'] + delta * peso_b
+    resultado['m2'] = a['m2'] + b['m2'] + delta ** 2 * cruzado
+    resultado['comoment'] = a['comoment'] + b['comoment'] + delta * delta.T * cruzado
+    return resultado
+
+
+def acumular(acumulador, df):
+    """
+    Añade las columnas numéricas de `df` al acumulador. Los NaN solo excluyen los pares
+    en los que aparecen, como en DataFrame.corr().
+    """
+    df = df.select_dtypes(include=["number"])
+    columnas = list(df.columns)
+    valores = df.to_numpy(dtype=float)
+    presentes = (~np.isnan(valores)).astype(float)
+    ceros = np.nan_to_num(valores)
+
+    # Estadísticos del lote por pares (i, j): se calculan sobre las filas con ambas columnas
+    n = presentes.T @ presentes
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media = np.where(n > 0, (ceros.T @ presentes) / n, 0.0)
+    m2 = (ceros ** 2).T @ presentes - n * media ** 2
+    comoment = ceros.T @ ceros - n * media * media.T
+
+    lote = nuevo_acumulador(columnas)
+    lote['filas'] = len(df)
+    lote['n'] = n
+    lote['media'] = media
+    lote['m2'] = m2
+    lote['comoment'] = comoment
+    return fusionar(acumulador, lote)
+
+
+def matriz_correlacion(acumulador, proporcion_no_nulos=PROPORCION_NO_NULOS):
+    """
+    Matriz de correlación de Pearson por pares, descartando antes las columnas con menos de
+    int(proporcion_no_nulos * filas) valores no nulos.
+    """
+    no_nulos = np.diag(acumulador['n'])
+    conservar = np.flatnonzero(no_nulos >= int(proporcion_no_nulos * acumulador['filas']))
+    columnas = [acumulador['columnas'][i] for i in conservar]
+
+    seleccion = np.ix_(conservar, conservar)
+    comoment = acumulador['comoment'][seleccion]
+    m2 = acumulador['m2'][seleccion]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        divisor = np.sqrt(m2 * m2.T)
+        correlacion = np.where(divisor > 0, comoment / divisor, np.nan)
+    return pd.DataFrame(correlacion, index=columnas, columns=columnas)
+
+
+def acumular_partido(ruta_partido, metricas_a_calcular):
+    """
+    Acumulador con las métricas de un único partido (vacío si hay algún error).
+    Se ejecuta en los procesos del pool: el almacén del partido ya está construido y, si no,
+    se decodifica en un solo proceso.
+    """
+    acumulador = nuevo_acumulador()
+    try:
+        resultados = calcular_metricas(cargar_partido(ruta_partido, procesos=1), metricas_a_calcular)
+        acumulador = acumular(acumulador, tabla_partido(resultados))
+    except Exception as e:
+        print(f"Error procesando {ruta_partido}: {e}")
+    return acumulador
+
+
+def _acumular_partido(argumentos):
+    return acumular_partido(*argumentos)
+
+
+def correlaciones_partidos(rutas_partidos, metricas_a_calcular, procesos=None):
+    """
+    Acumula las métricas de todos los partidos sin guardar sus tablas, repartiéndolos entre
+    varios procesos (None = todos los núcleos, 1 = sin pool).
+
+    Returns:
+        Acumulador (ver nuevo_acumulador); la matriz se obtiene con matriz_correlacion.
+    """
+    tareas = [(ruta, metricas_a_calcular) for ruta in rutas_partidos]
+    acumulador = nuevo_acumulador()
+    # Los JSONL sin almacén se decodifican aquí, uno a uno, antes de repartir los partidos
+    preparar_almacenes(rutas_partidos, procesos)
+    procesos = min(procesos or os.cpu_count() or 1, max(len(tareas), 1))
+    if procesos <= 1:
+        for parcial in map(_acumular_partido, tareas):
+            acumulador = fusionar(acumulador, parcial)
+    else:
+        # Se fusiona en el orden de los partidos para que el resultado no dependa del reparto
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            for parcial in pool.map(_acumular_partido, tareas):
+                acumulador = fusionar(acumulador, parcial)
+    return acumulador
+
+
+def rutas_partidos(ruta_datos, num_partidos=None):
+    """Rutas de los JSONL de las primeras `num_partidos` carpetas (orden alfabético)."""
+    rutas = []
+    for carpeta in sorted(os.listdir(ruta_datos))[:num_partidos]:
+        ruta_partido = os.path.join(ruta_datos, carpeta, f"{carpeta.split()[0]}_SecondSpectrum_Data.jsonl")
+        if os.path.exists(ruta_partido):
+            rutas.append(ruta_partido)
+    return rutas
+
+
+def reducir_correlaciones(df_corr, umbrales):
+    """
+    Selección voraz de columnas poco correlacionadas para uno o varios umbrales.
+
+    Se recorren, en orden (fila, columna) del triángulo superior, los pares con |correlación|
+    mayor o igual que el umbral; de cada par se elimina la columna con mayor suma de
+    |correlaciones| (la segunda si empatan). Los pares con alguna columna ya eliminada se ignoran.
+
+    Args:
+        df_corr: Matriz de correlación (DataFrame cuadrado).
+        umbrales: Umbral o lista de umbrales.
+
+    Returns:
+        Diccionario umbral -> {'eliminadas': set de columnas, 'conservadas': lista en el orden de df_corr}.
+    """
+    if np.isscalar(umbrales):
+        umbrales = [umbrales]
+    columnas = list(df_corr.columns)
+    abs_corr = np.abs(df_corr.to_numpy(dtype=float))
+    sumas = np.nansum(abs_corr, axis=0)
+
+    # Pares del triángulo superior, ya en orden de recorrido (fila, columna)
+    filas, cols = np.nonzero(np.triu(np.ones(abs_corr.shape, dtype=bool), k=1))
+    valores = abs_corr[filas, cols]
+    # Columna a eliminar de cada par
+    perdedora = np.where(sumas[filas] > sumas[cols], filas, cols)
+
+    reducciones = {}
+    for umbral in umbrales:
+        candidatos = np.flatnonzero(valores >= umbral)
+        eliminada = np.zeros(len(columnas), dtype=bool)
+        for fila, col, quitar in zip(filas[candidatos], cols[candidatos], perdedora[candidatos]):
+            if not (eliminada[fila] or eliminada[col]):
+                eliminada[quitar] = True
+        reducciones[umbral] = {
+            'eliminadas': {columnas[i] for i in np.flatnonzero(eliminada)},
+            'conservadas': [columnas[i] for i in np.flatnonzero(~eliminada)],
+        }
+    return reducciones
+
+
+def matriz_reducida(df_corr, umbral):
+    """Submatriz de correlación con las columnas que conserva reducir_correlaciones."""
+    conservadas = reducir_correlaciones(df_corr, umbral)[umbral]['conservadas']
+    return df_corr.loc[conservadas, conservadas]
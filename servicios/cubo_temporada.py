@@ -0,0 +1,284 @@
+import os
+import json
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from servicios.procesa_partidos import cargar_partido, FRAME_DURATION
+from servicios.indice_partidos import actualizar_indice, SUFIJO_CARPETA
+from servicios.almacen_tracking import huella_fichero, preparar_almacenes
+from metricas.colectivas.metricas_por_intervalo import construir_acumulados
+
+VERSION_CUBO = 1
+CARPETA_CUBO = os.path.join("cache", "cubo_temporada")
+RESOLUCION_CUBO = 60        # segundos de reloj por fila (una fila por jugador, partido y minuto)
+
+# Dimensiones de cada fila del cubo; el resto de columnas son métricas (float32)
+DIMENSIONES = {
+    'partido': np.int32,    # posición en meta['partidos']
+    'jugador': np.int32,    # posición en meta['jugadores']
+    'equipo': np.int32,     # posición en meta['equipos']
+    'local': np.int8,       # 1 si el equipo del jugador juega en casa
+    'periodo': np.int8,
+    'minuto': np.int16,     # minuto de partido
+}
+
+
+def _filas_partido(ruta_data):
+    """
+    Filas del cubo de un partido: métricas aditivas por jugador y minuto en que ha jugado.
+    Se ejecuta en los procesos del pool (el almacén ya está construido, ver _filas_partidos);
+    los jugadores se devuelven como playerId.
+    """
+    partido = cargar_partido(ruta_data, procesos=1)
+    acumulados = construir_acumulados(partido, FRAME_DURATION, resolucion=RESOLUCION_CUBO)
+    valores = np.diff(acumulados['sumas'], axis=0)
+    columnas = acumulados['columnas']
+    tramo, columna = np.nonzero(valores[..., columnas.index('playingTime')] > 0)
+    return {
+        'jugadores': list(partido['jugadores']),
+        'equipo': np.asarray(partido['equipo']),
+        'columna': columna,
+        'periodo': acumulados['periodo'][tramo],
+        'minuto': np.floor(acumulados['minuto'][tramo]),
+        'valores': valores[tramo, columna].astype(np.float32),
+        'columnas': columnas,
+    }
+
+
+def _filas_partidos(rutas, procesos=None):
+    """Filas de varios partidos, en orden, repartidos entre procesos (None = todos los núcleos)."""
+    # Los JSONL sin almacén se decodifican aquí, uno a uno, antes de repartir los partidos
+    preparar_almacenes(rutas, procesos)
+    procesos = min(procesos or os.cpu_count() or 1, max(len(rutas), 1))
+    if procesos <= 1:
+        yield from map(_filas_partido, rutas)
+        return
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        yield from pool.map(_filas_partido, rutas)
+
+
+def _leer_meta(carpeta):
+    try:
+        with open(os.path.join(carpeta, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get('version') == VERSION_CUBO else None
+
+
+def abrir_cubo(carpeta=CARPETA_CUBO):
+    """
+    Abre el cubo guardado con numpy.memmap.
+
+    Returns:
+        Diccionario con 'meta' ('partidos', 'jugadores', 'equipos', 'columnas') y un array por
+        dimensión y por métrica, o None si el cubo no existe.
+    """
+    meta = _leer_meta(carpeta)
+    if meta is None:
+        return None
+    cubo = {'meta': meta}
+    for campo in list(DIMENSIONES) + meta['columnas']:
+        cubo[campo] = np.load(os.path.join(carpeta, f"{campo}.npy"), mmap_mode='r')
+    return cubo
+
+
+def _guardar_cubo(cubo, carpeta):
+    os.makedirs(carpeta, exist_ok=True)
+    sufijo = f".tmp{os.getpid()}.{threading.get_ident()}"
+    for campo in list(DIMENSIONES) + cubo['meta']['columnas']:
+        destino = os.path.join(carpeta, f"{campo}.npy")
+        with open(destino + sufijo, 'wb') as f:
+            np.save(f, cubo[campo])
+        os.replace(destino + sufijo, destino)
+    # meta.json va al final y marca el cubo como válido
+    destino = os.path.join(carpeta, 'meta.json')
+    with open(destino + sufijo, 'w', encoding='utf-8') as f:
+        json.dump(cubo['meta'], f)
+    os.replace(destino + sufijo, destino)
+
+
+def _codigo(tabla, posiciones, valor):
+    posicion = posiciones.get(valor)
+    if posicion is None:
+        posicion = posiciones[valor] = len(tabla)
+        tabla.append(valor)
+    return posicion
+
+
+def actualizar_cubo(base_datos='datos', procesos=None, carpeta=CARPETA_CUBO, progreso=None):
+    """
+    Devuelve el cubo de la temporada, calculando solo los partidos nuevos o cuyo JSONL ha
+    cambiado y quitando los que ya no están. Los partidos se reparten entre varios procesos
+    (None = todos los núcleos, 1 = sin pool).
+
+    Las filas de los partidos que se conservan no se recalculan, pero si hay cambios el cubo
+    se reescribe entero (todas las columnas, con las filas conservadas más las nuevas).
+
+    Args:
+        progreso: Función opcional llamada como progreso(terminados, total, carpeta) al
+                  terminar cada partido nuevo.
+    """
+    cubo = abrir_cubo(carpeta)
+    indice = actualizar_indice(base_datos)
+
+    # Partidos de la temporada con su huella actual
+    actuales = {}
+    for carpeta_partido, partido in sorted(indice['partidos'].items()):
+        match_id = carpeta_partido.replace(SUFIJO_CARPETA, "")
+        ruta_data = os.path.join(base_datos, carpeta_partido, f"{match_id}_SecondSpectrum_Data.jsonl")
+        try:
+            actuales[carpeta_partido] = (ruta_data, huella_fichero(ruta_data), partido)
+        except OSError:
+            continue
+
+    anteriores = {} if cubo is None else {p['carpeta']: k for k, p in enumerate(cubo['meta']['partidos'])}
+    conservados = [
+        c for c, k in anteriores.items()
+        if c in actuales and cubo['meta']['partidos'][k]['huella'] == actuales[c][1]
+    ]
+    nuevos = [c for c in actuales if c not in conservados]
+    if cubo is not None and not nuevos and len(conservados) == len(anteriores):
+        return cubo
+
+    # Tablas de partidos, jugadores y equipos: las existentes se mantienen y las nuevas se añaden
+    meta = {
+        'version': VERSION_CUBO,
+        'partidos': [],
+        'jugadores': [] if cubo is None else list(cubo['meta']['jugadores']),
+        'equipos': [] if cubo is None else list(cubo['meta']['equipos']),
+        'columnas': None if cubo is None else cubo['meta']['columnas'],
+    }
+    pos_jugadores = {j: k for k, j in enumerate(meta['jugadores'])}
+    pos_equipos = {e: k for k, e in enumerate(meta['equipos'])}
+    partes = []
+
+    if conservados:
+        posicion = np.full(len(anteriores), -1, dtype=np.int32)
+        for c in conservados:
+            posicion[anteriores[c]] = len(meta['partidos'])
+            meta['partidos'].append(cubo['meta']['partidos'][anteriores[c]])
+        filas = posicion[np.asarray(cubo['partido'])] >= 0
+        parte = {campo: np.asarray(cubo[campo])[filas] for campo in list(DIMENSIONES) + meta['columnas']}
+        parte['partido'] = posicion[parte['partido']]
+        partes.append(parte)
+
+    resultados = _filas_partidos([actuales[c][0] for c in nuevos], procesos)
+    for terminados, (carpeta_partido, filas) in enumerate(zip(nuevos, resultados), start=1):
+        if progreso is not None:
+            progreso(terminados, len(nuevos), carpeta_partido)
+        _, huella, partido = actuales[carpeta_partido]
+        meta['columnas'] = meta['columnas'] or filas['columnas']
+        if filas['columnas'] != meta['columnas']:
+            raise ValueError("Las métricas del partido no coinciden con las del cubo")
+
+        # Nombres de los equipos a partir de la descripción ("EVE - CHE : 2022-8-6")
+        nombres = partido['descripcion'].split(" : ")[0].split(" - ")
+        if len(nombres) != 2:
+            nombres = ["home", "away"]
+        jugadores = np.array(
+            [_codigo(meta['jugadores'], pos_jugadores, j) for j in filas['jugadores']], dtype=np.int32
+        )
+        equipos = np.array(
+            [_codigo(meta['equipos'], pos_equipos, nombres[e].strip()) for e in filas['equipo']], dtype=np.int32
+        )
+
+        columna = filas['columna']
+        parte = {
+            'partido': np.full(len(columna), len(meta['partidos']), dtype=np.int32),
+            'jugador': jugadores[columna],
+            'equipo': equipos[columna],
+            'local': (filas['equipo'][columna] == 0).astype(np.int8),
+            'periodo': filas['periodo'].astype(np.int8),
+            'minuto': filas['minuto'].astype(np.int16),
+        }
+        for k, nombre in enumerate(meta['columnas']):
+            parte[nombre] = filas['valores'][:, k]
+        partes.append(parte)
+        meta['partidos'].append({
+            'carpeta': carpeta_partido,
+            'huella': huella,
+            'fecha': partido['fecha'],
+            'descripcion': partido['descripcion'],
+        })
+
+    meta['columnas'] = meta['columnas'] or []
+    nuevo = {'meta': meta}
+    for campo, tipo in list(DIMENSIONES.items()) + [(c, np.float32) for c in meta['columnas']]:
+        nuevo[campo] = np.concatenate([parte[campo] for parte in partes] or [np.zeros(0)]).astype(tipo)
+    _guardar_cubo(nuevo, carpeta)
+    return abrir_cubo(carpeta)
+
+
+def _mascara(cubo, dimension, tabla, valores):
+    """Filas cuya dimensión está entre `valores` (identificadores de la tabla de meta)."""
+    posiciones = {v: k for k, v in enumerate(tabla)}
+    codigos = [posiciones[v] for v in valores if v in posiciones]
+    return np.isin(cubo[dimension], codigos)
+
+
+def consultar_cubo(cubo, jugadores=None, equipos=None, partidos=None, periodos=None,
+                   desde=None, hasta=None, local=None, agrupar='jugador'):
+    """
+    Agrega las métricas del cubo (sumas) con filtros por dimensión.
+
+    Args:
+        cubo: Resultado de actualizar_cubo o abrir_cubo.
+        jugadores: playerId a incluir (None = todos).
+        equipos: Nombres de equipo a incluir (p.ej. ['EVE']).
+        partidos: Carpetas de partido a incluir.
+        periodos: Periodos a incluir.
+        desde, hasta: Rango de minutos de partido [desde, hasta).
+        local: True solo partidos en casa, False solo fuera (del equipo del jugador).
+        agrupar: 'jugador', 'partido', 'equipo', 'minuto' o una lista de ellas.
+
+    Returns:
+        DataFrame con las dimensiones de agrupación, 'partidos' (partidos distintos) y la
+        suma de cada métrica.
+    """
+    meta = cubo['meta']
+    filas = np.ones(len(cubo['partido']), dtype=bool)
+    if jugadores is not None:
+        filas &= _mascara(cubo, 'jugador', meta['jugadores'], jugadores)
+    if equipos is not None:
+        filas &= _mascara(cubo, 'equipo', meta['equipos'], equipos)
+    if partidos is not None:
+        filas &= _mascara(cubo, 'partido', [p['carpeta'] for p in meta['partidos']], partidos)
+    if periodos is not None:
+        filas &= np.isin(cubo['periodo'], list(periodos))
+    if desde is not None:
+        filas &= np.asarray(cubo['minuto']) >= desde
+    if hasta is not None:
+        filas &= np.asarray(cubo['minuto']) < hasta
+    if local is not None:
+        filas &= np.asarray(cubo['local']) == int(local)
+    indices = np.flatnonzero(filas)
+
+    # Clave de grupo combinando las dimensiones elegidas
+    agrupar = [agrupar] if isinstance(agrupar, str) else list(agrupar)
+    claves = [np.asarray(cubo[dimension])[indices].astype(np.int64) for dimension in agrupar]
+    if claves:
+        grupos, grupo = np.unique(np.stack(claves, axis=1), axis=0, return_inverse=True)
+        grupo = grupo.ravel()
+    else:
+        grupos, grupo = np.zeros((1, 0), dtype=np.int64), np.zeros(len(indices), dtype=np.int64)
+    n_grupos = len(grupos)
+
+    tablas = {
+        'jugador': meta['jugadores'],
+        'equipo': meta['equipos'],
+        'partido': [p['carpeta'] for p in meta['partidos']],
+    }
+    df = pd.DataFrame({
+        ('playerId' if dimension == 'jugador' else dimension):
+            [tablas[dimension][k] for k in grupos[:, i]] if dimension in tablas else grupos[:, i]
+        for i, dimension in enumerate(agrupar)
+    })
+    partido_grupo = np.unique(grupo * len(meta['partidos']) + np.asarray(cubo['partido'])[indices])
+    df['partidos'] = np.bincount(partido_grupo // max(len(meta['partidos']), 1), minlength=n_grupos)
+    for columna in meta['columnas']:
+        df[columna] = np.bincount(grupo, weights=np.asarray(cubo[columna])[indices], minlength=n_grupos)
+    return df
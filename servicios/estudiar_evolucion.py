@@ -1,104 +1,143 @@
 import os
-import json
-from metricas.individuales.distancia_aceleraciones_individual import dist_aceleraciones_individual 
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from metricas.individuales.distancia_aceleraciones_individual import dist_aceleraciones_individual
 from metricas.individuales.distancia_umbrales_estandar_individual import dist_umbrales_estandar_individual
 from metricas.individuales.distancia_umbrales_relativos_individual import dist_umbrales_relativos_individual
 from metricas.individuales.potencia_metabolica_individual import pot_metabolica_individual
 from metricas.individuales.ritmo_de_juego_individual import ritmo_juego_individual
+from servicios.procesa_partidos import cargar_partido, FRAME_DURATION
+from servicios.indice_partidos import partidos_jugador
+from servicios.almacen_tracking import preparar_almacenes
+from metricas.individuales.trayectoria import extraer_trayectoria
 
-FRAME_STEP = 5      # frecuencia reducida para submuestreo (25 Hz -> 5 Hz)
-FRAME_DURATION = 0.2
+PROCESOS_EVOLUCION = None   # procesos para repartir los partidos (None = todos los núcleos)
 
 
-def cargar_partido(ruta):
+def cargar_trayectoria(ruta_data, player_id):
     """
-    Carga un archivo JSONL de tracking con submuestreo a 5 Hz
+    Trayectoria del jugador en un partido, común a todas las métricas individuales. Del
+    almacén solo se leen las columnas de ese jugador; si falta, se decodifica en un solo
+    proceso (iterar_partidos los construye antes de repartir).
     """
-    data = []
-    with open(ruta, 'r') as f:
-        for i, linea in enumerate(f):
-            if (i + 1) % FRAME_STEP == 0:
-                data.append(json.loads(linea))
-    return data
-
-
-# servicios/estudiar_evolucion.py
-
-import os
-import json
-from servicios.procesa_partidos import cargar_partido
-
-def recorrer_partidos(func_metrica, player_id, metrica_clave):
-    
-    resultados = []
-    base_datos = "datos"  # Carpeta raíz donde están los subdirectorios de partidos
+    return extraer_trayectoria(cargar_partido(ruta_data, jugadores=[player_id], procesos=1), player_id)
 
-    for carpeta in sorted(os.listdir(base_datos)):
-        if not carpeta.endswith(" All Data Files"):
-            continue
 
+def _partidos_evolucion(player_id, base_datos):
+    """
+    (nombre del partido sin fecha, ruta del JSONL) de los partidos en los que participa el
+    jugador, ordenados por fecha real.
+    """
+    partidos = []
+    for partido in partidos_jugador(player_id, base_datos):
+        carpeta = partido["carpeta"]
         match_id = carpeta.replace(" All Data Files", "")
-        ruta_carpeta = os.path.join(base_datos, carpeta)
-
-        # Ruta a metadata
-        nombre_meta = f"{match_id}_SecondSpectrum_Metadata.json"
-        ruta_metadata = os.path.join(ruta_carpeta, nombre_meta)
-        if not os.path.exists(ruta_metadata):
-            continue
-
-        with open(ruta_metadata, "r", encoding="utf-8") as f:
-            meta = json.load(f)
-
-        # Obtener nombre completo del partido, p.ej. "EVE - CHE : 2022-8-6"
-        descripcion_completa = meta.get("description", match_id)
-        match_sin_fecha = descripcion_completa.split(" : ")[0]
 
-        # Comprueba participación
-        ssi_ids = [p.get("ssiId") for p in meta.get("homePlayers", []) + meta.get("awayPlayers", [])]
-        if player_id not in ssi_ids:
-            continue
+        # Nombre del partido sin fecha, p.ej. "EVE - CHE" de "EVE - CHE : 2022-8-6"
+        match_sin_fecha = partido["descripcion"].split(" : ")[0]
 
         # Ruta a datos del partido
         nombre_data = f"{match_id}_SecondSpectrum_Data.jsonl"
-        ruta_data = os.path.join(ruta_carpeta, nombre_data)
-        if not os.path.exists(ruta_data):
-            continue
+        ruta_data = os.path.join(base_datos, carpeta, nombre_data)
+        if os.path.exists(ruta_data):
+            partidos.append((match_sin_fecha, ruta_data))
+    return partidos
 
-        data = cargar_partido(ruta_data)
-        df_metrica = func_metrica(data, player_id, FRAME_DURATION)
 
-        # Extrae valor de la métrica
-        if metrica_clave in df_metrica.columns and not df_metrica.empty:
-            valor = df_metrica.at[0, metrica_clave]
-            # Solo añade si el valor es distinto de cero
-            if valor != 0:
-                resultados.append({"match": match_sin_fecha, "valor": valor})
-
-    return resultados
+def _valor_partido(func_metrica, ruta_data, player_id, metrica_clave):
+    """
+    Valor de la métrica del jugador en un partido (None si la métrica no existe).
+    Se ejecuta en los procesos del pool, por eso es una función de módulo.
+    """
+    trayectoria = cargar_trayectoria(ruta_data, player_id)
+    df_metrica = func_metrica(trayectoria, player_id, FRAME_DURATION)
 
+    if metrica_clave in df_metrica.columns and not df_metrica.empty:
+        return df_metrica.at[0, metrica_clave]
+    return None
 
 
+def iterar_partidos(func_metrica, player_id, metrica_clave, procesos=PROCESOS_EVOLUCION):
+    """
+    Calcula la métrica del jugador en todos sus partidos repartiéndolos entre varios procesos
+    y va devolviendo el progreso a medida que terminan.
+
+    Args:
+        func_metrica: Métrica individual (ver metricas/individuales).
+        player_id: ID del jugador.
+        metrica_clave: Columna de la métrica a extraer.
+        procesos: Número de procesos del pool (None = todos los núcleos, 1 = sin pool).
+
+    Yields:
+        (partidos_terminados, total_partidos, resultados), donde resultados es la lista de
+        {"match", "valor"} de los partidos terminados con valor distinto de cero, siempre en
+        el orden de los partidos (por fecha), independientemente del orden en que terminen.
+    """
+    partidos = _partidos_evolucion(player_id, "datos")
+    total = len(partidos)
+    valores = [None] * total
+
+    def resultados():
+        # Solo añade los valores distintos de cero
+        return [
+            {"match": match, "valor": valor}
+            for (match, _), valor in zip(partidos, valores)
+            if valor is not None and valor != 0
+        ]
+
+    # Los JSONL sin almacén se decodifican aquí, uno a uno, antes de repartir los partidos
+    preparar_almacenes([ruta_data for _, ruta_data in partidos], procesos)
+    procesos = min(procesos or os.cpu_count() or 1, total)
+    if procesos <= 1:
+        for i, (_, ruta_data) in enumerate(partidos):
+            valores[i] = _valor_partido(func_metrica, ruta_data, player_id, metrica_clave)
+            yield i + 1, total, resultados()
+        return
+
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        futuros = {
+            pool.submit(_valor_partido, func_metrica, ruta_data, player_id, metrica_clave): i
+            for i, (_, ruta_data) in enumerate(partidos)
+        }
+        for terminados, futuro in enumerate(as_completed(futuros), start=1):
+            valores[futuros[futuro]] = futuro.result()
+            yield terminados, total, resultados()
+
+
+def recorrer_partidos(func_metrica, player_id, metrica_clave, procesos=PROCESOS_EVOLUCION):
+    resultados = []
+    for _, _, resultados in iterar_partidos(func_metrica, player_id, metrica_clave, procesos):
+        pass
+    return resultados
 
 
+FUNCIONES_EVOLUCION = {
+    "Aceleraciones": dist_aceleraciones_individual,
+    "Umbrales estándar": dist_umbrales_estandar_individual,
+    "Umbrales relativos": dist_umbrales_relativos_individual,
+    "Metabólicas": pot_metabolica_individual,
+    "Ritmo de juego": ritmo_juego_individual,
+}
 
-def metricas_evolucion(player_id, metrica_seleccionada, grupo_metrica):
 
+def iterar_evolucion(player_id, metrica_seleccionada, grupo_metrica, procesos=PROCESOS_EVOLUCION):
+    """
+    Versión progresiva de metricas_evolucion: devuelve (terminados, total, resultados)
+    cada vez que termina un partido (ver iterar_partidos).
+    """
     metrica_clave = metrica_seleccionada[0] if metrica_seleccionada else None
 
-    if grupo_metrica == "Aceleraciones":
-        return recorrer_partidos(dist_aceleraciones_individual, player_id, metrica_clave)
-
-    elif grupo_metrica == "Umbrales estándar":
-        return recorrer_partidos(dist_umbrales_estandar_individual, player_id, metrica_clave)
+    func_metrica = FUNCIONES_EVOLUCION.get(grupo_metrica)
+    if func_metrica is None:
+        return iter(())
+    return iterar_partidos(func_metrica, player_id, metrica_clave, procesos)
 
-    elif grupo_metrica == "Umbrales relativos":
-        return recorrer_partidos(dist_umbrales_relativos_individual, player_id, metrica_clave)
 
-    elif grupo_metrica == "Metabólicas":
-        return recorrer_partidos(pot_metabolica_individual, player_id, metrica_clave)
+def metricas_evolucion(player_id, metrica_seleccionada, grupo_metrica, procesos=PROCESOS_EVOLUCION):
 
-    elif grupo_metrica == "Ritmo de juego":
-        return recorrer_partidos(ritmo_juego_individual, player_id, metrica_clave)
+    metrica_clave = metrica_seleccionada[0] if metrica_seleccionada else None
 
-    else:
-        return None
\ No newline at end of file
+    func_metrica = FUNCIONES_EVOLUCION.get(grupo_metrica)
+    if func_metrica is None:
+        return None
+    return recorrer_partidos(func_metrica, player_id, metrica_clave, procesos)
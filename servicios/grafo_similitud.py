@@ -1,43 +1,335 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd
+import networkx as nx
 import streamlit as st
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.metrics import pairwise_distances
 
-def generar_grafo(jugador_base, metricas_seleccionadas, N):
-    csv_path = "config/metricas_con_nombres.csv"
+RUTA_METRICAS = "config/metricas_con_nombres.csv"
+MATRICES_EN_CACHE = 32      # matrices (por métricas, pesos y distancia) que se mantienen en memoria
+DISTANCIAS = ('euclidea', 'coseno', 'mahalanobis', 'rangos')
+TOLERANCIA_COVARIANZA = 1e-10   # autovalores relativos por debajo se tratan como nulos (métricas redundantes)
+DISPOSICIONES_EN_CACHE = 64     # grafos (jugador, métricas, pesos, distancia) con disposición guardada
+ARISTAS_ENTRE_VECINOS = 3       # vecinos más parecidos de cada vecino que lo atraen en la disposición
+
+# Disposiciones calculadas por grafo y N; se comparten entre las sesiones de Streamlit (hilos)
+_DISPOSICIONES = OrderedDict()
+_CERROJO = threading.RLock()
+
+
+def _huella_tabla(ruta):
+    """Identifica la versión del CSV (si cambia, se vuelve a leer)."""
+    estado = os.stat(ruta)
+    return ruta, estado.st_size, estado.st_mtime_ns
+
+
+def huella_csv(ruta=RUTA_METRICAS):
+    """Hash del contenido del CSV de la temporada (no cambia al copiar o hacer checkout)."""
+    with open(ruta, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+@lru_cache(maxsize=1)
+def _leer_tabla(huella):
+    df = pd.read_csv(huella[0])
+    return {
+        'df': df,
+        'jugadores': df["Jugador"].to_numpy(),
+        'posiciones': {jugador: k for k, jugador in enumerate(df["Jugador"])},
+    }
+
+
+def cargar_tabla(ruta=RUTA_METRICAS):
+    """
+    Tabla de métricas de la temporada, leída una sola vez por versión del CSV.
+
+    Returns:
+        Diccionario con 'huella', 'df', 'jugadores' (nombres en orden de fila) y
+        'posiciones' (nombre -> fila).
+    """
+    huella = _huella_tabla(ruta)
+    return dict(_leer_tabla(huella), huella=huella)
+
+
+@lru_cache(maxsize=MATRICES_EN_CACHE)
+def _matriz_normalizada(huella, metricas):
+    valores = _leer_tabla(huella)['df'][list(metricas)].to_numpy(dtype=float)
+    # Escalado min-max a [0, 1] (como MinMaxScaler: las columnas constantes quedan a 0)
+    minimo = valores.min(axis=0)
+    rango = valores.max(axis=0) - minimo
+    rango[rango == 0] = 1.0
+    matriz = (valores - minimo) / rango
+    matriz.setflags(write=False)
+    return matriz
+
+
+def matriz_normalizada(metricas, ruta=RUTA_METRICAS):
+    """
+    Matriz jugadores x métricas escalada a [0, 1], guardada en una caché LRU por CSV y
+    subconjunto de métricas (ordenado, así que el orden de selección no importa).
+    """
+    return _matriz_normalizada(_huella_tabla(ruta), tuple(sorted(metricas)))
+
+
+@lru_cache(maxsize=MATRICES_EN_CACHE)
+def _blanqueo(huella, metricas):
+    """
+    Matriz B con B Bᵀ = inversa (pseudoinversa si es singular) de la covarianza de las
+    métricas: la distancia de Mahalanobis es la euclídea entre las filas de X @ B.
+    """
+    valores = _leer_tabla(huella)['df'][list(metricas)].to_numpy(dtype=float)
+    covarianza = np.atleast_2d(np.cov(valores, rowvar=False))
+    autovalores, autovectores = np.linalg.eigh(covarianza)
+    conservar = autovalores > autovalores.max() * TOLERANCIA_COVARIANZA
+    return autovectores[:, conservar] / np.sqrt(autovalores[conservar])
+
+
+def _representacion(huella, metricas, distancia):
+    """Matriz jugadores x dimensiones sobre la que se mide cada tipo de distancia."""
+    if distancia == 'euclidea':
+        return _matriz_normalizada(huella, metricas)
+    valores = _leer_tabla(huella)['df'][list(metricas)]
+    if distancia == 'rangos':
+        # Percentil de cada jugador en cada métrica
+        return valores.rank(pct=True).to_numpy(dtype=float)
+    valores = valores.to_numpy(dtype=float)
+    if distancia == 'coseno':
+        # Perfil respecto a la media: métricas tipificadas
+        desviacion = valores.std(axis=0)
+        desviacion[desviacion == 0] = 1.0
+        return (valores - valores.mean(axis=0)) / desviacion
+    return valores - valores.mean(axis=0)
+
+
+@lru_cache(maxsize=MATRICES_EN_CACHE)
+def _matriz_distancias(huella, metricas, pesos, distancia):
+    # Los pesos multiplican la contribución de cada métrica: Σ w·Δ² en la euclídea y los
+    # rangos, Δᵀ·W½·Σ⁻¹·W½·Δ en Mahalanobis y Σ w·a·b en el producto escalar del coseno
+    matriz = _representacion(huella, metricas, distancia) * np.sqrt(pesos)
+    if distancia == 'mahalanobis':
+        matriz = matriz @ _blanqueo(huella, metricas)
+
+    # Todos contra todos en una sola operación
+    productos = matriz @ matriz.T
+    cuadrados = np.diag(productos)
+    if distancia == 'coseno':
+        normas = np.sqrt(cuadrados)
+        normas[normas == 0] = np.inf
+        distancias = 1.0 - productos / np.outer(normas, normas)
+    else:
+        distancias = np.sqrt(np.maximum(cuadrados[:, None] + cuadrados[None, :] - 2 * productos, 0.0))
+    np.fill_diagonal(distancias, 0.0)
+    distancias.setflags(write=False)
+    return distancias
+
+
+def _clave(metricas, pesos, distancia):
+    """Métricas ordenadas y pesos alineados con ellas (1 si no se indican)."""
+    if distancia not in DISTANCIAS:
+        raise ValueError(f"Distancia desconocida: {distancia} (opciones: {DISTANCIAS})")
+    metricas = tuple(sorted(metricas))
+    pesos = pesos or {}
+    return metricas, tuple(float(pesos.get(m, 1.0)) for m in metricas), distancia
+
+
+def matriz_distancias(metricas, pesos=None, distancia='euclidea', ruta=RUTA_METRICAS):
+    """
+    Distancias entre todos los jugadores, calculadas como una operación matricial y
+    guardadas en caché por CSV, métricas, pesos y tipo de distancia.
+
+    Args:
+        metricas: Columnas del CSV.
+        pesos: Diccionario métrica -> peso (None o métricas ausentes = 1).
+        distancia: 'euclidea' (métricas escaladas a [0, 1]), 'coseno' (1 - coseno entre
+                   perfiles tipificados), 'mahalanobis' (covarianza de la temporada) o
+                   'rangos' (euclídea entre percentiles).
+
+    Returns:
+        Matriz P x P en el orden de filas del CSV.
+    """
+    return _matriz_distancias(_huella_tabla(ruta), *_clave(metricas, pesos, distancia))
+
+
+def _mas_cercanos(distancias, n):
+    """Posiciones de las n menores distancias de cada fila, ordenadas (empates por posición)."""
+    n = min(n, distancias.shape[-1])
+    if n <= 0:
+        return np.zeros(distancias.shape[:-1] + (0,), dtype=np.int64)
+    candidatos = np.argpartition(distancias, n - 1, axis=-1)[..., :n]
+    candidatos = np.sort(candidatos, axis=-1)
+    orden = np.argsort(np.take_along_axis(distancias, candidatos, axis=-1), axis=-1, kind='stable')
+    return np.take_along_axis(candidatos, orden, axis=-1)
 
-    # Cargar CSV
+
+def vecinos_similares(jugador_base, metricas, N, pesos=None, distancia='euclidea', ruta=RUTA_METRICAS):
+    """
+    Los N jugadores más parecidos a `jugador_base` según matriz_distancias, sin ordenar
+    toda la tabla.
+
+    Returns:
+        DataFrame con las filas del CSV (métricas seleccionadas escaladas a [0, 1]) y
+        'distancia', de menor a mayor distancia.
+    """
+    tabla = cargar_tabla(ruta)
+    columnas = sorted(metricas)
+    base = tabla['posiciones'][jugador_base]
+
+    distancias = matriz_distancias(metricas, pesos, distancia, ruta)[base].copy()
+    distancias[base] = np.inf
+    filas = _mas_cercanos(distancias, min(N, len(distancias) - 1))
+
+    df = tabla['df'].iloc[filas].copy()
+    df[columnas] = matriz_normalizada(metricas, ruta)[filas]
+    df["distancia"] = distancias[filas]
+    return df
+
+
+@lru_cache(maxsize=MATRICES_EN_CACHE)
+def _grafo_knn(huella, metricas, pesos, distancia, N):
+    distancias = np.array(_matriz_distancias(huella, metricas, pesos, distancia))
+    np.fill_diagonal(distancias, np.inf)
+
+    vecinos = _mas_cercanos(distancias, min(N, len(distancias) - 1))
+    resultado = {
+        'vecinos': vecinos,
+        'distancias': np.take_along_axis(distancias, vecinos, axis=1),
+    }
+    for valor in resultado.values():
+        valor.setflags(write=False)
+    return resultado
+
+
+def grafo_knn(metricas, N, pesos=None, distancia='euclidea', ruta=RUTA_METRICAS):
+    """
+    Grafo de los N vecinos más cercanos de todos los jugadores, calculado de una vez y
+    guardado en caché por CSV, métricas, pesos, distancia y N.
+
+    Returns:
+        Diccionario con 'jugadores' (P,), 'posiciones' (nombre -> fila), 'vecinos' (P x N,
+        filas de los vecinos de cada jugador, de más a menos parecido) y 'distancias' (P x N).
+    """
+    tabla = cargar_tabla(ruta)
+    grafo = _grafo_knn(tabla['huella'], *_clave(metricas, pesos, distancia), N)
+    return dict(grafo, jugadores=tabla['jugadores'], posiciones=tabla['posiciones'])
+
+
+def vecindario(grafo, jugador_base, saltos=2):
+    """
+    Jugadores a los que se llega desde `jugador_base` siguiendo como mucho `saltos` aristas
+    del grafo kNN (vecinos de vecinos...).
+
+    Returns:
+        DataFrame con 'Jugador', 'salto' (número de aristas), 'desde' (jugador por el que se
+        llega) y 'distancia' (de la arista de llegada), en orden de descubrimiento.
+    """
+    jugadores, vecinos, distancias = grafo['jugadores'], grafo['vecinos'], grafo['distancias']
+    inicio = grafo['posiciones'][jugador_base]
+    visitados = {inicio}
+    frontera = [inicio]
+    filas = []
+    for salto in range(1, saltos + 1):
+        siguiente = []
+        for origen in frontera:
+            for destino, distancia in zip(vecinos[origen], distancias[origen]):
+                if destino in visitados:
+                    continue
+                visitados.add(destino)
+                siguiente.append(destino)
+                filas.append((jugadores[destino], salto, jugadores[origen], distancia))
+        frontera = siguiente
+    return pd.DataFrame(filas, columns=["Jugador", "salto", "desde", "distancia"])
+
+
+def _angulos_muelles(jugador_base, vecinos, distancias, inicial):
+    """
+    Posiciones de nx.spring_layout con el jugador base fijo en el centro. Además de las
+    aristas con el base, cada vecino se une a sus ARISTAS_ENTRE_VECINOS más parecidos,
+    así que los jugadores parecidos entre sí quedan en direcciones próximas.
+    """
+    G = nx.Graph()
+    G.add_node(jugador_base)
+    G.add_edges_from((jugador_base, vecino) for vecino in vecinos)
+    if len(vecinos) > 1:
+        cercanos = _mas_cercanos(distancias + np.diag(np.full(len(vecinos), np.inf)), ARISTAS_ENTRE_VECINOS)
+        for i, fila in enumerate(cercanos):
+            G.add_edges_from((vecinos[i], vecinos[j]) for j in fila if j != i)
+
+    inicial = dict(inicial or {})
+    inicial[jugador_base] = (0.0, 0.0)
+    return nx.spring_layout(G, pos=inicial, fixed=[jugador_base], seed=42)
+
+
+def disposicion_grafo(jugador_base, df_vecinos, metricas, pesos=None, distancia='euclidea', ruta=RUTA_METRICAS):
+    """
+    Disposición del grafo de similitud de `jugador_base`: cada vecino a una distancia del
+    centro igual a su distancia al base, en la dirección que le da la disposición de muelles.
+
+    Las disposiciones se guardan por (CSV, jugador, métricas, pesos, distancia, N); si cambia
+    solo N, se parte de la disposición guardada con el N más próximo.
+
+    Args:
+        jugador_base: Jugador del centro.
+        df_vecinos: Resultado de generar_grafo / vecinos_similares.
+        metricas, pesos, distancia: Los usados para obtener df_vecinos.
+
+    Returns:
+        DataFrame con 'Jugador', 'x', 'y' y 'distancia' (el base primero, en el origen).
+    """
+    metricas, pesos, distancia = _clave(metricas, pesos, distancia)
+    clave = (_huella_tabla(ruta), jugador_base, metricas, pesos, distancia)
+    N = len(df_vecinos)
+    with _CERROJO:
+        guardadas = _DISPOSICIONES.setdefault(clave, {})
+        _DISPOSICIONES.move_to_end(clave)
+        while len(_DISPOSICIONES) > DISPOSICIONES_EN_CACHE:
+            _DISPOSICIONES.popitem(last=False)
+        muelles = guardadas.get(N)
+        inicial = guardadas[min(guardadas, key=lambda n: abs(n - N))] if guardadas and muelles is None else None
+
+    vecinos = df_vecinos["Jugador"].tolist()
+    if muelles is None:
+        filas = [cargar_tabla(ruta)['posiciones'][v] for v in vecinos]
+        matriz = matriz_distancias(metricas, dict(zip(metricas, pesos)), distancia, ruta)
+        distancias = np.array(matriz[np.ix_(filas, filas)])
+        muelles = _angulos_muelles(jugador_base, vecinos, distancias, inicial)
+        with _CERROJO:
+            guardadas[N] = muelles
+
+    radio = df_vecinos["distancia"].to_numpy(dtype=float)
+    direccion = np.array([muelles[v] for v in vecinos]).reshape(-1, 2) - np.asarray(muelles[jugador_base])
+    angulo = np.arctan2(direccion[:, 1], direccion[:, 0])
+    return pd.DataFrame({
+        "Jugador": [jugador_base] + vecinos,
+        "x": np.concatenate([[0.0], radio * np.cos(angulo)]),
+        "y": np.concatenate([[0.0], radio * np.sin(angulo)]),
+        "distancia": np.concatenate([[0.0], radio]),
+    })
+
+
+def generar_grafo(jugador_base, metricas_seleccionadas, N, pesos=None, distancia='euclidea'):
+    csv_path = RUTA_METRICAS
+
+    # Cargar CSV (una sola vez mientras no cambie)
     try:
-        df = pd.read_csv(csv_path)
+        tabla = cargar_tabla(csv_path)
     except FileNotFoundError:
         st.error(f"No se encontró el archivo '{csv_path}'.")
         return
 
     # Verificar que el jugador_base existe
-    if jugador_base not in df["Jugador"].values:
+    if jugador_base not in tabla['posiciones']:
         st.error(f"El jugador '{jugador_base}' no se encuentra en la columna 'Jugador'.")
         return
 
     # Verificar que todas las métricas seleccionadas existen en el DataFrame
-    faltantes = [m for m in metricas_seleccionadas if m not in df.columns]
+    faltantes = [m for m in metricas_seleccionadas if m not in tabla['df'].columns]
     if faltantes:
         st.error(f"Las siguientes métricas no están en el CSV: {faltantes}")
         return
 
-    # Copiar DataFrame y normalizar las columnas de métricas en rango [0, 1]
-    df_norm = df.copy()
-    scaler = MinMaxScaler()
-    df_norm[metricas_seleccionadas] = scaler.fit_transform(df[metricas_seleccionadas])
-
-    # Obtener valores normalizados del jugador_base
-    valores_base = df_norm.loc[df_norm["Jugador"] == jugador_base, metricas_seleccionadas].values.reshape(1, -1)
-
-    # Calcular distancias euclídeas contra todos los jugadores (incluyendo base)
-    valores_otros = df_norm[metricas_seleccionadas].values
-    distancias = pairwise_distances(valores_base, valores_otros, metric="euclidean")[0]
-    df_norm["distancia"] = distancias
-
-    # Filtrar los N más cercanos, excluyendo jugador_base
-    df_vecinos = df_norm[df_norm["Jugador"] != jugador_base].nsmallest(N, "distancia")
-
-    return df_vecinos
\ No newline at end of file
+    # N más cercanos, excluyendo jugador_base
+    return vecinos_similares(jugador_base, metricas_seleccionadas, N, pesos, distancia, csv_path)
@@ -0,0 +1,145 @@
+import os
+import json
+import threading
+from datetime import date
+
+from servicios.almacen_tracking import huella_fichero
+
+VERSION_INDICE = 1
+RUTA_INDICE = os.path.join("cache", "indice_partidos.json")
+SUFIJO_CARPETA = " All Data Files"
+
+
+def fecha_partido(descripcion):
+    """
+    Fecha real del partido a partir de la descripción del metadata ("EVE - CHE : 2022-8-6").
+
+    Returns:
+        Fecha en formato ISO ('2022-08-06') o None si no se puede interpretar.
+    """
+    try:
+        anio, mes, dia = (int(parte) for parte in descripcion.split(" : ")[1].strip().split("-"))
+        return date(anio, mes, dia).isoformat()
+    except (IndexError, ValueError):
+        return None
+
+
+def _leer_partido(carpeta, ruta_metadata):
+    """
+    Entrada del índice para un partido: descripción, fecha y equipo de cada jugador.
+    """
+    with open(ruta_metadata, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+
+    match_id = carpeta.replace(SUFIJO_CARPETA, "")
+    descripcion = meta.get("description", match_id)
+    equipos = descripcion.split(" : ")[0].split(" - ")
+    local = equipos[0].strip() if len(equipos) == 2 else "home"
+    visitante = equipos[1].strip() if len(equipos) == 2 else "away"
+
+    jugadores = {}
+    for equipo, clave in ((local, "homePlayers"), (visitante, "awayPlayers")):
+        for p in meta.get(clave, []):
+            if p.get("ssiId") is not None:
+                jugadores.setdefault(p["ssiId"], equipo)
+
+    return {
+        "huella": huella_fichero(ruta_metadata),
+        "match_id": match_id,
+        "descripcion": descripcion,
+        "fecha": fecha_partido(descripcion),
+        "jugadores": jugadores,
+    }
+
+
+def _indice_jugadores(partidos):
+    """
+    Invierte el índice: ssiId -> lista de partidos (carpeta, fecha, descripción, equipo)
+    ordenada por fecha real del partido.
+    """
+    jugadores = {}
+    for carpeta, partido in partidos.items():
+        for ssi_id, equipo in partido["jugadores"].items():
+            jugadores.setdefault(ssi_id, []).append({
+                "carpeta": carpeta,
+                "fecha": partido["fecha"],
+                "descripcion": partido["descripcion"],
+                "equipo": equipo,
+            })
+    for lista in jugadores.values():
+        lista.sort(key=lambda p: (p["fecha"] is None, p["fecha"] or "", p["carpeta"]))
+    return jugadores
+
+
+def cargar_indice(ruta=RUTA_INDICE):
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            indice = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return indice if indice.get("version") == VERSION_INDICE else None
+
+
+def guardar_indice(indice, ruta=RUTA_INDICE):
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = ruta + f".tmp{os.getpid()}.{threading.get_ident()}"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(indice, f)
+    os.replace(temporal, ruta)
+
+
+def actualizar_indice(base_datos="datos", ruta=RUTA_INDICE):
+    """
+    Devuelve el índice de participación de la temporada, construyéndolo la primera vez a
+    partir de los metadata y actualizándolo solo con las carpetas nuevas, modificadas o borradas.
+
+    Returns:
+        Diccionario con 'partidos' (carpeta -> descripción, fecha y equipo de cada jugador)
+        y 'jugadores' (ssiId -> partidos en los que participa, ordenados por fecha).
+    """
+    indice = cargar_indice(ruta) or {"version": VERSION_INDICE, "base_datos": base_datos, "partidos": {}}
+    if indice.get("base_datos") != base_datos:
+        indice = {"version": VERSION_INDICE, "base_datos": base_datos, "partidos": {}}
+
+    anteriores = indice["partidos"]
+    partidos = {}
+    cambios = False
+    carpetas = sorted(os.listdir(base_datos)) if os.path.isdir(base_datos) else []
+    for carpeta in carpetas:
+        if not carpeta.endswith(SUFIJO_CARPETA):
+            continue
+
+        match_id = carpeta.replace(SUFIJO_CARPETA, "")
+        ruta_metadata = os.path.join(base_datos, carpeta, f"{match_id}_SecondSpectrum_Metadata.json")
+        try:
+            huella = huella_fichero(ruta_metadata)
+        except OSError:
+            continue
+
+        anterior = anteriores.get(carpeta)
+        if anterior is not None and anterior["huella"] == huella:
+            partidos[carpeta] = anterior
+            continue
+
+        try:
+            partidos[carpeta] = _leer_partido(carpeta, ruta_metadata)
+        except (OSError, ValueError) as e:
+            print(f"Error leyendo metadata {ruta_metadata}: {e}")
+            continue
+        cambios = True
+
+    if cambios or set(partidos) != set(anteriores) or "jugadores" not in indice:
+        indice["partidos"] = partidos
+        indice["jugadores"] = _indice_jugadores(partidos)
+        guardar_indice(indice, ruta)
+    return indice
+
+
+def partidos_jugador(player_id, base_datos="datos"):
+    """
+    Partidos en los que participa un jugador, ordenados por fecha real del partido.
+
+    Returns:
+        Lista de diccionarios con 'carpeta', 'fecha', 'descripcion' y 'equipo'.
+    """
+    return actualizar_indice(base_datos)["jugadores"].get(player_id, [])
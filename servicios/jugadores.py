@@ -1,12 +1,88 @@
 import json
+import threading
 
+import numpy as np
 
-def cargar_diccionario_jugadores(ruta='config/dicc_jugadores.json'):
+from servicios.indice_partidos import cargar_indice
+
+RUTA_DICCIONARIO = 'config/dicc_jugadores.json'
+
+# Tabla de códigos de jugador del proceso: playerId (UUID) <-> código entero denso (int32).
+# Solo crece, así que un código no cambia de jugador mientras vive el proceso.
+_TABLA = {'ids': [], 'codigos': {}, 'iniciada': False}
+_CERROJO = threading.Lock()
+
+
+def cargar_diccionario_jugadores(ruta=RUTA_DICCIONARIO):
     with open(ruta, 'r', encoding='utf-8') as f:
         return json.load(f)
 
-def reemplazar_ids_por_nombres(df, diccionario, columna='playerId'):
+
+def _iniciar_tabla():
+    """
+    Primeros códigos: los jugadores del diccionario (en su orden) y después los del índice de
+    partidos (metadata), ordenados. Así los procesos de un mismo pool asignan los mismos códigos.
+    """
+    try:
+        ids = list(cargar_diccionario_jugadores())
+    except (OSError, ValueError):
+        ids = []
+    indice = cargar_indice() or {}
+    ids += sorted(indice.get('jugadores', {}))
+    for player_id in ids:
+        if player_id not in _TABLA['codigos']:
+            _TABLA['codigos'][player_id] = len(_TABLA['ids'])
+            _TABLA['ids'].append(player_id)
+    _TABLA['iniciada'] = True
+
+
+def codificar_jugadores(player_ids):
+    """
+    Códigos int32 de los jugadores; los que aún no están en la tabla reciben uno nuevo.
+    """
+    with _CERROJO:
+        if not _TABLA['iniciada']:
+            _iniciar_tabla()
+        codigos = _TABLA['codigos']
+        resultado = np.empty(len(player_ids), dtype=np.int32)
+        for k, player_id in enumerate(player_ids):
+            codigo = codigos.get(player_id)
+            if codigo is None:
+                codigo = codigos[player_id] = len(_TABLA['ids'])
+                _TABLA['ids'].append(player_id)
+            resultado[k] = codigo
+        return resultado
+
+
+def ids_jugadores(codigos):
+    """playerId (UUID) de cada código de la tabla."""
+    ids = _TABLA['ids']
+    return [ids[codigo] for codigo in np.asarray(codigos).tolist()]
+
+
+def restaurar_ids(df, columna='playerId'):
+    """
+    Copia del DataFrame con los códigos enteros de `columna` sustituidos por los playerId.
+    Si la columna ya contiene playerId se devuelve tal cual.
+    """
+    if columna not in df.columns or df[columna].dtype.kind not in 'iu':
+        return df
+    df = df.copy()
+    df[columna] = ids_jugadores(df[columna].to_numpy())
+    return df
+
+
+def codificar_ids(df, columna='playerId'):
+    """Inverso de restaurar_ids: sustituye los playerId de `columna` por sus códigos."""
+    if columna not in df.columns or df[columna].dtype.kind in 'iu':
+        return df
     df = df.copy()
+    df[columna] = codificar_jugadores(df[columna].tolist())
+    return df
+
+
+def reemplazar_ids_por_nombres(df, diccionario, columna='playerId'):
+    df = restaurar_ids(df, columna).copy()
     if columna in df.columns:
         df[columna] = df[columna].map(diccionario).fillna(df[columna])
     return df
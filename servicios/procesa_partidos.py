@@ -1,43 +1,183 @@
-import json
-from functools import lru_cache
+from servicios.almacen_tracking import (
+    abrir_almacen, submuestrear, seleccionar_lineas, recortar, filtrar_jugadores, huella_fichero
+)
+from servicios import cache_partidos
+from servicios.registro_esfuerzos import registro_actualizado, guardar_registro
+from servicios.jugadores import codificar_jugadores, codificar_ids, restaurar_ids
+from servicios.cache_resultados import (
+    parametros_metrica, clave_resultado, leer_resultado, guardar_resultado, huella_partido
+)
 
-from metricas.colectivas.potencia_metabolica import pot_metabolica
+from metricas.cinematica import (
+    construir_cinematica, UMBRALES_VELOCIDAD_KMH, VENTANA_SAVGOL, ORDEN_SAVGOL
+)
+from metricas.colectivas.potencia_metabolica import pot_metabolica, C1, C2, C3, UMBRAL_POTENCIA_ALTA
 from metricas.colectivas.ritmo_de_juego import ritmo_juego
-from metricas.colectivas.cambio_de_direcciones import cambios_direccion
-from metricas.colectivas.distancia_aceleraciones import dist_aceleraciones
+from metricas.colectivas.cambio_de_direcciones import cambios_direccion, CATEGORIAS_ANGULO
+from metricas.colectivas.distancia_aceleraciones import (
+    dist_aceleraciones, calcular_velocidades, RANGOS_ACELERACION, ACELERACION_MAXIMA
+)
 from metricas.colectivas.distancia_umbrales_estandar import dist_umbrales_estandar
-from metricas.colectivas.distancia_umbrales_relativos import dist_umbrales_relativos
+from metricas.colectivas.distancia_umbrales_relativos import (
+    dist_umbrales_relativos, PORCENTAJES_DISTANCIA, PORCENTAJES_ESFUERZO
+)
+from metricas.colectivas.eventos_esfuerzo import calcular_eventos
+from metricas.colectivas.picos_intensidad import (
+    picos_intensidad, VENTANAS_MINUTOS, UMBRAL_ALTA_VELOCIDAD_KMH, PRESENCIA_MINIMA
+)
 
 FRAME_STEP = 5      # frecuencia reducida para submuestreo (25 Hz -> 5 Hz)
 FRAME_DURATION = 0.2
 
-@lru_cache(maxsize=16)
-def cargar_partido(ruta):
+_SUAVIZADO = {
+    'UMBRALES_VELOCIDAD_KMH': UMBRALES_VELOCIDAD_KMH,
+    'VENTANA_SAVGOL': VENTANA_SAVGOL,
+    'ORDEN_SAVGOL': ORDEN_SAVGOL,
+}
+
+# Familias de métricas por encuentro (en el orden de salida) con la función que las calcula
+# y las constantes de las que depende su resultado (forman parte de la clave de la caché)
+FAMILIAS_METRICAS = {
+    'potencia': (pot_metabolica, {
+        'C1': C1, 'C2': C2, 'C3': C3, 'UMBRAL_POTENCIA_ALTA': UMBRAL_POTENCIA_ALTA,
+    }),
+    'ritmo': (ritmo_juego, _SUAVIZADO),
+    'cambios': (cambios_direccion, {'CATEGORIAS_ANGULO': CATEGORIAS_ANGULO}),
+    'aceleraciones': (dist_aceleraciones, {
+        'RANGOS_ACELERACION': RANGOS_ACELERACION,
+        'ACELERACION_MAXIMA': ACELERACION_MAXIMA,
+        'calcular_velocidades': parametros_metrica(calcular_velocidades),
+    }),
+    'umbral_est': (dist_umbrales_estandar, _SUAVIZADO),
+    'umbral_rel': (dist_umbrales_relativos, dict(
+        _SUAVIZADO, PORCENTAJES_DISTANCIA=PORCENTAJES_DISTANCIA, PORCENTAJES_ESFUERZO=PORCENTAJES_ESFUERZO
+    )),
+    'picos': (picos_intensidad, dict(
+        _SUAVIZADO, C1=C1, C2=C2, C3=C3, UMBRAL_POTENCIA_ALTA=UMBRAL_POTENCIA_ALTA,
+        VENTANAS_MINUTOS=VENTANAS_MINUTOS, UMBRAL_ALTA_VELOCIDAD_KMH=UMBRAL_ALTA_VELOCIDAD_KMH,
+        PRESENCIA_MINIMA=PRESENCIA_MINIMA,
+    )),
+}
+
+
+def _partido_submuestreado(ruta, procesos=None):
+    # La huella del JSONL forma parte de la clave: si el fichero cambia no se reutiliza el partido
+    huella = huella_fichero(ruta)
+    clave = (ruta, huella['tamano'], huella['mtime_ns'], FRAME_STEP)
+    return cache_partidos.obtener(
+        clave, lambda: _con_codigos(submuestrear(abrir_almacen(ruta, procesos), FRAME_STEP))
+    )
+
+
+def _con_codigos(partido):
+    # Códigos int32 de los jugadores, asignados al cargar (ver servicios/jugadores.py)
+    partido['codigos'] = codificar_jugadores(partido['jugadores'])
+    return partido
+
+
+def invalidar_partido(ruta=None):
+    """Descarta de la caché en memoria el partido de `ruta` (None = todos)."""
+    return cache_partidos.invalidar(None if ruta is None else lambda clave: clave[0] == ruta)
+
+
+def cargar_partido(ruta, jugadores=None, procesos=None):
     """
-    Carga un archivo JSONL de tracking con submuestreo a 5 Hz
+    Carga un archivo JSONL de tracking con submuestreo a 5 Hz.
+
+    El JSONL solo se decodifica la primera vez: se convierte en un almacén columnar
+    (ver servicios/almacen_tracking.py) que después se abre con numpy.memmap y se
+    reconstruye solo si el fichero de origen cambia. Los partidos abiertos se guardan en
+    una caché en memoria con presupuesto en bytes (ver servicios/cache_partidos.py).
+
+    Args:
+        ruta: Ruta del JSONL de tracking.
+        jugadores: IDs de los jugadores a conservar (None = todos). Solo se leen las columnas
+                   de esos jugadores; los campos por frame (periodo, reloj...) se mantienen.
+                   El partido filtrado no usa la caché de resultados de calcular_metricas.
+        procesos: Procesos para decodificar el JSONL si aún no tiene almacén (None = todos
+                  los núcleos). Los procesos de un pool de partidos usan 1 (ver
+                  almacen_tracking.preparar_almacenes).
     """
-    data = []
-    with open(ruta, 'r') as f:
-        for i, linea in enumerate(f):
-            if (i + 1) % FRAME_STEP == 0:
-                data.append(json.loads(linea))
-    return data
+    partido = _partido_submuestreado(ruta, procesos)
+    if jugadores is not None:
+        partido = filtrar_jugadores(partido, jugadores)
+    return partido
+
+
+def cargar_tramo(ruta, periodo=None, desde=None, hasta=None, frame_step=FRAME_STEP, jugadores=None,
+                 procesos=None):
+    """
+    Carga solo una parte del partido: un periodo, una ventana del reloj de juego [desde, hasta)
+    en segundos y/o otra frecuencia de submuestreo (p.ej. frame_step=25 para 1 Hz).
+    Solo se leen los frames seleccionados, gracias al índice de líneas del almacén columnar.
+
+    Con los valores por defecto devuelve los mismos frames que cargar_partido (`jugadores`
+    filtra igual que allí, y `procesos` también). Si se cambia
+    frame_step, la duración de cada frame pasa a ser frame_step * FRAME_DURATION / FRAME_STEP
+    (calcular_metricas la obtiene de tramo['frame_step']).
+    """
+    partido = abrir_almacen(ruta, procesos)
+    tramo = recortar(partido, seleccionar_lineas(partido, periodo, desde, hasta, frame_step))
+    tramo['frame_step'] = frame_step
+    _con_codigos(tramo)
+    if jugadores is not None:
+        tramo = filtrar_jugadores(tramo, jugadores)
+    return tramo
+
 
 def calcular_metricas(data, seleccion):
     """
     Ejecuta el cálculo de métricas físicas según la selección.
+
+    Si los datos son un partido cargado con cargar_partido, cada familia se busca antes en
+    la caché de resultados en disco (ver servicios/cache_resultados.py), identificada por la
+    huella del JSONL, el submuestreo, la duración del frame y los parámetros de la métrica.
+
+    La duración de cada frame sale del submuestreo de los datos ('frame_step'): FRAME_DURATION
+    a 5 Hz, 1 s en un tramo cargado con frame_step=25 (ver cargar_tramo).
+
+    La etapa cinemática (matrices de posición/velocidad y muestras por jugador) solo se
+    construye si falta alguna familia, y una sola vez para todas.
+
+    También guarda, si falta o está desactualizado, el registro de esfuerzos del partido
+    (ver servicios/registro_esfuerzos.py).
+
+    En las tablas resultantes 'playerId' es el código int32 del jugador; restaurar_ids o
+    reemplazar_ids_por_nombres (servicios/jugadores.py) recuperan los playerId o los nombres.
     """
+    huella = huella_partido(data)
+    frame_step = data.get('frame_step', FRAME_STEP) if isinstance(data, dict) else FRAME_STEP
+    duracion = frame_step * FRAME_DURATION / FRAME_STEP
+    cinematica = None
     resultados = {}
-    if 'potencia' in seleccion:
-        resultados['potencia'] = pot_metabolica(data, FRAME_DURATION)
-    if 'ritmo' in seleccion:
-        resultados['ritmo'] = ritmo_juego(data, FRAME_DURATION)
-    if 'cambios' in seleccion:
-        resultados['cambios'] = cambios_direccion(data, FRAME_DURATION)
-    if 'aceleraciones' in seleccion:
-        resultados['aceleraciones'] = dist_aceleraciones(data, FRAME_DURATION)
-    if 'umbral_est' in seleccion:
-        resultados['umbral_est'] = dist_umbrales_estandar(data, FRAME_DURATION)
-    if 'umbral_rel' in seleccion:
-        resultados['umbral_rel'] = dist_umbrales_relativos(data, FRAME_DURATION)
-    return resultados
\ No newline at end of file
+    for familia, (funcion, constantes) in FAMILIAS_METRICAS.items():
+        if familia not in seleccion:
+            continue
+
+        clave = None
+        if huella is not None:
+            clave = clave_resultado(
+                data['ruta'], huella, frame_step, duracion,
+                familia, parametros_metrica(funcion, constantes)
+            )
+            resultado = leer_resultado(clave)
+            if resultado is not None:
+                resultados[familia] = codificar_ids(resultado)
+                continue
+
+        if cinematica is None:
+            cinematica = construir_cinematica(data)
+        resultados[familia] = funcion(cinematica, duracion)
+        if clave is not None:
+            # En disco se guardan los playerId: los códigos solo valen dentro del proceso
+            guardar_resultado(clave, restaurar_ids(resultados[familia]))
+
+    # Cada procesado deja también el registro de esfuerzos del partido (una vez por JSONL)
+    if huella is not None and not registro_actualizado(data['ruta'], huella, frame_step, duracion):
+        if cinematica is None:
+            cinematica = construir_cinematica(data)
+        guardar_registro(
+            data['ruta'], huella, frame_step, duracion,
+            calcular_eventos(cinematica, duracion), data['jugadores']
+        )
+    return resultados
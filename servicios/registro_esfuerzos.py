@@ -0,0 +1,189 @@
+import os
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+
+from servicios.cache_resultados import parametros_metrica
+from servicios.indice_partidos import actualizar_indice, SUFIJO_CARPETA
+from metricas.colectivas.eventos_esfuerzo import calcular_eventos, TIPOS_ESFUERZO, UMBRAL_SPRINT_KMH
+from metricas.colectivas.potencia_metabolica import C1, C2, C3, UMBRAL_POTENCIA_ALTA
+from metricas.colectivas.distancia_aceleraciones import RANGOS_ACELERACION, calcular_velocidades
+
+VERSION_REGISTRO = 2
+EXTENSION_REGISTRO = ".esfuerzos"
+
+# Columnas del registro y su tipo en disco
+COLUMNAS_EVENTO = {
+    'jugador': np.int32,
+    'tipo': np.int8,
+    'banda': np.int8,
+    'periodo': np.int16,
+    'frame_inicio': np.int32,     # frameIdx del tracking
+    'frame_fin': np.int32,
+    'reloj_inicio': np.float32,   # reloj de juego (s)
+    'reloj_fin': np.float32,
+    'minuto': np.float32,         # minuto de partido en que empieza (ver minutos_partido)
+    'duracion': np.float32,
+    'pico': np.float32,
+    'distancia': np.float32,
+}
+
+
+def ruta_registro(ruta_jsonl):
+    """Carpeta del registro de esfuerzos de un partido, junto al JSONL."""
+    return os.path.splitext(ruta_jsonl)[0] + EXTENSION_REGISTRO
+
+
+def _parametros(frame_step, frame_duration):
+    parametros = parametros_metrica(calcular_eventos, {
+        'UMBRAL_SPRINT_KMH': UMBRAL_SPRINT_KMH,
+        'RANGOS_ACELERACION': RANGOS_ACELERACION,
+        'calcular_velocidades': parametros_metrica(calcular_velocidades),
+        'C1': C1, 'C2': C2, 'C3': C3, 'UMBRAL_POTENCIA_ALTA': UMBRAL_POTENCIA_ALTA,
+    })
+    parametros.update(frame_step=frame_step, frame_duration=frame_duration)
+    # Ida y vuelta por JSON para poder compararlos con los guardados en meta.json
+    return json.loads(json.dumps(parametros, default=str))
+
+
+def _leer_meta(carpeta):
+    try:
+        with open(os.path.join(carpeta, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get('version') == VERSION_REGISTRO else None
+
+
+def registro_actualizado(ruta_jsonl, huella, frame_step, frame_duration):
+    """True si el registro existe y se generó con ese JSONL y los mismos parámetros."""
+    meta = _leer_meta(ruta_registro(ruta_jsonl))
+    return (
+        meta is not None
+        and meta.get('huella') == huella
+        and meta.get('parametros') == _parametros(frame_step, frame_duration)
+    )
+
+
+def guardar_registro(ruta_jsonl, huella, frame_step, frame_duration, eventos, jugadores):
+    """
+    Guarda el registro de esfuerzos de un partido (ver calcular_eventos) ordenado por
+    jugador, tipo y frame, con un índice de posiciones por (jugador, tipo).
+
+    Args:
+        ruta_jsonl: JSONL de origen (el registro va en una carpeta a su lado).
+        huella: Huella del JSONL.
+        frame_step, frame_duration: Submuestreo y duración del frame con que se calcularon.
+        eventos: Diccionario de arrays de calcular_eventos.
+        jugadores: playerId de cada código de columna del partido.
+    """
+    carpeta = ruta_registro(ruta_jsonl)
+    os.makedirs(carpeta, exist_ok=True)
+    sufijo = f".tmp{os.getpid()}.{threading.get_ident()}"
+
+    n_tipos = len(TIPOS_ESFUERZO)
+    orden = np.lexsort((eventos['frame_inicio'], eventos['tipo'], eventos['jugador']))
+    clave = (eventos['jugador'] * n_tipos + eventos['tipo'])[orden]
+    # Los eventos del jugador j y tipo t son [indice[j * n_tipos + t], indice[j * n_tipos + t + 1])
+    indice = np.searchsorted(clave, np.arange(len(jugadores) * n_tipos + 1)).astype(np.int64)
+
+    arrays = {campo: np.asarray(eventos[campo])[orden].astype(tipo) for campo, tipo in COLUMNAS_EVENTO.items()}
+    arrays['indice'] = indice
+    for campo, array in arrays.items():
+        destino = os.path.join(carpeta, f"{campo}.npy")
+        with open(destino + sufijo, 'wb') as f:
+            np.save(f, array)
+        os.replace(destino + sufijo, destino)
+
+    # meta.json va al final y marca el registro como válido
+    meta = {
+        'version': VERSION_REGISTRO,
+        'huella': huella,
+        'parametros': _parametros(frame_step, frame_duration),
+        'jugadores': list(jugadores),
+        'tipos': list(TIPOS_ESFUERZO),
+    }
+    destino = os.path.join(carpeta, 'meta.json')
+    with open(destino + sufijo, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(destino + sufijo, destino)
+    return carpeta
+
+
+def abrir_registro(ruta_jsonl):
+    """
+    Abre con numpy.memmap el registro de esfuerzos de un partido.
+
+    Returns:
+        Diccionario con 'meta', 'indice' y un array por columna de COLUMNAS_EVENTO, o None
+        si el partido no tiene registro.
+    """
+    carpeta = ruta_registro(ruta_jsonl)
+    meta = _leer_meta(carpeta)
+    if meta is None:
+        return None
+    registro = {'meta': meta}
+    for campo in list(COLUMNAS_EVENTO) + ['indice']:
+        registro[campo] = np.load(os.path.join(carpeta, f"{campo}.npy"), mmap_mode='r')
+    return registro
+
+
+def leer_eventos(ruta_jsonl, jugadores=None, tipos=None):
+    """
+    Eventos de esfuerzo de un partido, leyendo del registro solo los jugadores y tipos pedidos.
+
+    Args:
+        ruta_jsonl: JSONL del partido.
+        jugadores: playerId a incluir (None = todos).
+        tipos: Tipos de TIPOS_ESFUERZO a incluir (None = todos).
+
+    Returns:
+        DataFrame con 'playerId', 'tipo' y el resto de COLUMNAS_EVENTO (vacío si no hay registro).
+    """
+    columnas = ['playerId'] + [c for c in COLUMNAS_EVENTO if c != 'jugador']
+    registro = abrir_registro(ruta_jsonl)
+    if registro is None:
+        return pd.DataFrame(columns=columnas)
+
+    meta = registro['meta']
+    n_tipos = len(meta['tipos'])
+    codigos = range(len(meta['jugadores'])) if jugadores is None else [
+        k for k, player_id in enumerate(meta['jugadores']) if player_id in set(jugadores)
+    ]
+    posiciones_tipo = range(n_tipos) if tipos is None else [meta['tipos'].index(t) for t in tipos]
+
+    indice = registro['indice']
+    filas = [
+        np.arange(indice[j * n_tipos + t], indice[j * n_tipos + t + 1])
+        for j in codigos for t in posiciones_tipo
+    ]
+    filas = np.concatenate(filas) if filas else np.zeros(0, dtype=np.int64)
+
+    df = pd.DataFrame({campo: np.asarray(registro[campo][filas]) for campo in COLUMNAS_EVENTO})
+    df.insert(0, 'playerId', [meta['jugadores'][j] for j in df.pop('jugador')])
+    df['tipo'] = [meta['tipos'][t] for t in df['tipo']]
+    return df[columnas]
+
+
+def eventos_temporada(base_datos='datos', jugadores=None, tipos=None):
+    """
+    Eventos de esfuerzo de todos los partidos con registro (sin leer datos de tracking),
+    con la carpeta y la fecha de cada partido, para filtrar y agregar en la temporada.
+    """
+    tablas = []
+    for carpeta, partido in sorted(actualizar_indice(base_datos)['partidos'].items()):
+        if jugadores is not None and not set(jugadores).intersection(partido['jugadores']):
+            continue
+        match_id = carpeta.replace(SUFIJO_CARPETA, "")
+        ruta_data = os.path.join(base_datos, carpeta, f"{match_id}_SecondSpectrum_Data.jsonl")
+        df = leer_eventos(ruta_data, jugadores, tipos)
+        if df.empty:
+            continue
+        df.insert(0, 'fecha', partido['fecha'])
+        df.insert(0, 'partido', carpeta)
+        tablas.append(df)
+    if not tablas:
+        return pd.DataFrame(columns=['partido', 'fecha', 'playerId'] + [c for c in COLUMNAS_EVENTO if c != 'jugador'])
+    return pd.concat(tablas, ignore_index=True)
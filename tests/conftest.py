@@ -0,0 +1,77 @@
+import os
+import json
+
+import numpy as np
+import pytest
+
+from servicios import cache_partidos
+
+FRAMES_POR_PARTE = 3000     # 2 minutos por parte a 25 Hz
+
+
+def escribir_partido(base_datos, match_id, fecha="2022-8-6", frames_por_parte=FRAMES_POR_PARTE, semilla=0):
+    """
+    Escribe un partido sintético con el formato de SecondSpectrum (metadata y JSONL de tracking
+    a 25 Hz, dos partes, 11 jugadores por equipo que cambian de ritmo y de rumbo).
+
+    Returns:
+        Ruta del JSONL de tracking.
+    """
+    rng = np.random.default_rng(semilla)
+    carpeta = os.path.join(base_datos, f"{match_id} All Data Files")
+    os.makedirs(carpeta, exist_ok=True)
+    local = [f"{match_id}-local-{i}" for i in range(11)]
+    visitante = [f"{match_id}-visitante-{i}" for i in range(11)]
+    meta = {
+        "description": f"ARS - CHE : {fecha}",
+        "homePlayers": [{"ssiId": p, "number": i + 1} for i, p in enumerate(local)],
+        "awayPlayers": [{"ssiId": p, "number": i + 1} for i, p in enumerate(visitante)],
+        "fps": 25.0,
+    }
+    with open(os.path.join(carpeta, f"{match_id}_SecondSpectrum_Metadata.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+    jugadores = local + visitante
+    n = len(jugadores)
+    posiciones = rng.uniform([-50, -30], [50, 30], size=(n, 2))
+    velocidades = np.zeros((n, 2))
+    objetivo = np.full(n, 1.5)
+    rumbo = rng.uniform(-np.pi, np.pi, n)
+    ruta = os.path.join(carpeta, f"{match_id}_SecondSpectrum_Data.jsonl")
+    with open(ruta, "w", encoding="utf-8") as f:
+        frame_idx = 0
+        for periodo in (1, 2):
+            for k in range(frames_por_parte):
+                cambia = rng.random(n) < 0.01
+                objetivo[cambia] = rng.choice([0.0, 1.5, 3.5, 5.0, 6.5, 8.0], size=cambia.sum())
+                rumbo += np.where(rng.random(n) < 0.01, rng.normal(0, 1.5, n), 0.0)
+                deseada = np.stack([np.cos(rumbo), np.sin(rumbo)], 1) * objetivo[:, None]
+                velocidades += (deseada - velocidades) * 0.08
+                posiciones = np.clip(posiciones + velocidades * 0.04, [-52, -34], [52, 34])
+                rapidez = np.hypot(velocidades[:, 0], velocidades[:, 1])
+
+                def equipo(ids, desplazamiento):
+                    return [
+                        {"playerId": p, "number": i + 1,
+                         "xyz": [round(float(posiciones[desplazamiento + i, 0]), 2),
+                                 round(float(posiciones[desplazamiento + i, 1]), 2), 0.0],
+                         "speed": round(float(rapidez[desplazamiento + i]), 3)}
+                        for i, p in enumerate(ids)
+                    ]
+
+                frame = {
+                    "period": periodo, "frameIdx": frame_idx, "gameClock": round(k * 0.04, 2),
+                    "live": True, "homePlayers": equipo(local, 0), "awayPlayers": equipo(visitante, 11),
+                }
+                f.write(json.dumps(frame) + "\n")
+                frame_idx += 1
+    return ruta
+
+
+@pytest.fixture
+def base_datos(tmp_path, monkeypatch):
+    """Carpeta de datos vacía; las cachés en disco ('cache/') quedan dentro de tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    cache_partidos.invalidar()
+    yield "datos"
+    cache_partidos.invalidar()
@@ -0,0 +1,19 @@
+import pytest
+
+from conftest import escribir_partido
+from servicios.agregador_temporada import promediar_temporada
+
+
+@pytest.mark.parametrize("procesos", [1, 2])
+def test_partido_ilegible_no_cuenta_en_la_temporada(base_datos, procesos):
+    escribir_partido(base_datos, "g1", fecha="2022-8-6")
+    ruta_rota = escribir_partido(base_datos, "g2", fecha="2022-8-13", frames_por_parte=10)
+    with open(ruta_rota, "w", encoding="utf-8") as f:
+        f.write('{"period": 1, "frameIdx": 0, "homePla')
+
+    jugadores = ["g1-local-0", "g2-local-0"]
+    df = promediar_temporada(jugadores, base_datos, min_minutes=0, procesos=procesos)
+
+    assert df['playerId'].tolist() == ["g1-local-0"]
+    assert df['partidos'].tolist() == [1]
+    assert df['minutos'].iloc[0] > 0
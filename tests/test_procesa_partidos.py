@@ -0,0 +1,23 @@
+import pytest
+
+from conftest import escribir_partido
+from servicios.procesa_partidos import cargar_partido, cargar_tramo, calcular_metricas
+from servicios.jugadores import restaurar_ids
+
+
+def _por_jugador(data):
+    resultados = calcular_metricas(data, ['ritmo', 'umbral_est'])
+    ritmo = restaurar_ids(resultados['ritmo']).set_index('playerId')
+    umbral = restaurar_ids(resultados['umbral_est']).set_index('playerId')
+    return ritmo['playingTime'], umbral['totalDistance']
+
+
+def test_tramo_a_1hz_usa_la_duracion_de_su_frame(base_datos):
+    ruta = escribir_partido(base_datos, "g1")
+
+    minutos_5hz, distancia_5hz = _por_jugador(cargar_partido(ruta))
+    minutos_1hz, distancia_1hz = _por_jugador(cargar_tramo(ruta, frame_step=25))
+
+    assert minutos_1hz.to_dict() == pytest.approx(minutos_5hz.to_dict(), rel=0.02)
+    # A 1 Hz la trayectoria se suaviza algo, pero la escala debe ser la misma
+    assert distancia_1hz.to_dict() == pytest.approx(distancia_5hz.to_dict(), rel=0.15)